@@ -0,0 +1,231 @@
+"""Aggregates kept as mergeable partial states, updated in place when films are ingested.
+
+Add a batch of films (and retract corrected ones) without recomputing the
+genre, decade, period, actor and profit aggregates over the whole corpus:
+
+    python aggregate_state.py new_films.json                      # append / replace films
+    python aggregate_state.py fixed_films.json --retract tt0111161  # also drop films by title ID
+
+A film whose title ID is already in the dataset replaces the stored one.
+Ingesting still costs a pass over the whole dataset: the file is rewritten
+and reloaded, and the radar and stacked charts, which have no partial
+state, are rebuilt from every film. The aggregate snapshot is then saved for
+the new dataset version, so the server serves the updated aggregates after
+a restart without computing anything.
+"""
+import argparse
+import json
+import math
+import re
+
+from indexes import actor_id, extract_full_name
+
+TITLE_ID_PATTERN = re.compile(r'/title/(tt\d+)')
+STATE_FORMAT = 1
+
+
+def title_id(film):
+    """IMDb title ID (tt...) of a film, taken from its link"""
+    match = TITLE_ID_PATTERN.search(film.get('link') or '')
+    return match.group(1) if match else None
+
+
+def _number(value):
+    # Numeric film fields as float, None when missing (the store normalizes them the same way)
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+class Moments:
+    """Count, sum and sum of squares of a group of values; states add up and subtract"""
+
+    __slots__ = ('count', 'total', 'total_sq')
+
+    def __init__(self, count=0, total=0.0, total_sq=0.0):
+        self.count = count
+        self.total = total
+        self.total_sq = total_sq
+
+    def add(self, value, sign=1):
+        self.count += sign
+        self.total += sign * value
+        self.total_sq += sign * value * value
+
+    def merge(self, other, sign=1):
+        self.count += sign * other.count
+        self.total += sign * other.total
+        self.total_sq += sign * other.total_sq
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def variance(self):
+        if not self.count:
+            return None
+        mean = self.total / self.count
+        return max(self.total_sq / self.count - mean * mean, 0.0)
+
+    def to_json(self):
+        return [self.count, self.total, self.total_sq]
+
+    @classmethod
+    def from_json(cls, values):
+        return cls(*values)
+
+
+def _merge_groups(groups, other, sign):
+    for key, moments in other.items():
+        groups.setdefault(key, Moments()).merge(moments, sign)
+        if groups[key].count == 0:
+            del groups[key]
+
+
+class AggregateState:
+    """Partial states of the genre, decade, 5-year period, actor and profit category aggregates.
+
+    Every group holds Moments, so adding a film, retracting it or merging
+    the states of two batches only touches the groups of those films.
+    """
+
+    def __init__(self):
+        self.genres = {}        # genre -> Moments of box office
+        self.decades = {}       # decade -> Moments of IMDb rating
+        self.periods = {}       # 5-year period -> Moments of IMDb rating
+        self.period_levels = {}  # 5-year period -> [high, mid, low] rated film counts
+        self.actors = {}        # IMDb name ID -> Moments of box office (missing counts as 0)
+        self.actor_names = {}
+        self.profit = [0, 0, 0]  # films per aggregates.PROFIT_CATEGORIES entry
+
+    @classmethod
+    def from_films(cls, films):
+        state = cls()
+        state.apply(films)
+        return state
+
+    def apply(self, films, sign=1):
+        """Add films to the state (sign=1) or retract films added before (sign=-1)"""
+        for film in films:
+            self._apply_film(film, sign)
+        return self
+
+    def _group(self, groups, key, value, sign):
+        moments = groups.setdefault(key, Moments())
+        moments.add(value, sign)
+        if moments.count == 0:
+            del groups[key]
+
+    def _apply_film(self, film, sign):
+        year = _number(film.get('year'))
+        imdb = _number(film.get('imdb'))
+        box_office = _number(film.get('box_office'))
+        budget = _number(film.get('production_budget'))
+
+        if box_office is not None:
+            for genre in film.get('genres') or []:
+                self._group(self.genres, genre, box_office, sign)
+
+        if year is not None and imdb is not None:
+            self._group(self.decades, int(year // 10 * 10), imdb, sign)
+
+        # Films without a rating or year (or with a zero one) are left out of the trends
+        if year and imdb:
+            period = int(year // 5 * 5)
+            self._group(self.periods, period, imdb, sign)
+            levels = self.period_levels.setdefault(period, [0, 0, 0])
+            level = 0 if imdb > 7.0 else (1 if imdb >= 6 else 2)
+            levels[level] += sign
+            if period not in self.periods:
+                del self.period_levels[period]
+
+        seen = set()
+        for actor in film.get('actors') or []:
+            key = actor_id(actor)
+            if key is None or key in seen:
+                continue
+            seen.add(key)
+            self.actor_names.setdefault(key, extract_full_name(actor))
+            self._group(self.actors, key, box_office or 0.0, sign)
+            if key not in self.actors:
+                del self.actor_names[key]
+
+        if box_office is not None and budget is not None:
+            # Same rule as aggregates.profit_category_codes
+            self.profit[0 if box_office < budget else (1 if box_office < budget * 2 else 2)] += sign
+
+    def merge(self, other, sign=1):
+        """Add (or with sign=-1 subtract) the state of another batch of films"""
+        _merge_groups(self.genres, other.genres, sign)
+        _merge_groups(self.decades, other.decades, sign)
+        _merge_groups(self.periods, other.periods, sign)
+        for period, levels in other.period_levels.items():
+            own = self.period_levels.setdefault(period, [0, 0, 0])
+            for i, count in enumerate(levels):
+                own[i] += sign * count
+            if period not in self.periods:
+                del self.period_levels[period]
+        for key, name in other.actor_names.items():
+            self.actor_names.setdefault(key, name)
+        _merge_groups(self.actors, other.actors, sign)
+        self.actor_names = {key: name for key, name in self.actor_names.items() if key in self.actors}
+        self.profit = [own + sign * count for own, count in zip(self.profit, other.profit)]
+        return self
+
+    def to_json(self):
+        def groups(values):
+            # [key, value] pairs rather than objects so decade/period keys stay numbers
+            return [[key, moments.to_json()] for key, moments in values.items()]
+
+        return {
+            'format': STATE_FORMAT,
+            'genres': groups(self.genres),
+            'decades': groups(self.decades),
+            'periods': groups(self.periods),
+            'period_levels': [[period, levels] for period, levels in self.period_levels.items()],
+            'actors': [[key, self.actor_names.get(key), moments.to_json()] for key, moments in self.actors.items()],
+            'profit': self.profit,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        if not isinstance(data, dict) or data.get('format') != STATE_FORMAT:
+            return None
+        state = cls()
+        state.genres = {key: Moments.from_json(values) for key, values in data['genres']}
+        state.decades = {key: Moments.from_json(values) for key, values in data['decades']}
+        state.periods = {key: Moments.from_json(values) for key, values in data['periods']}
+        state.period_levels = {period: list(levels) for period, levels in data['period_levels']}
+        state.actors = {key: Moments.from_json(values) for key, _, values in data['actors']}
+        state.actor_names = {key: name for key, name, _ in data['actors']}
+        state.profit = list(data['profit'])
+        return state
+
+
+def main():
+    # Imported here, aggregates depends on this module
+    from aggregates import aggregates
+
+    parser = argparse.ArgumentParser(description="Ingest new or corrected films and update the aggregates in place")
+    parser.add_argument('films', nargs='?', help="JSON file with a list of films to add or replace")
+    parser.add_argument('--retract', nargs='*', default=[], metavar='TITLE_ID',
+                        help="title IDs (tt...) of films to remove")
+    parser.add_argument('--dataset', default='all_known', help="dataset to update (default: all_known)")
+    args = parser.parse_args()
+    if not args.films and not args.retract:
+        parser.error("nothing to ingest, pass a films file and/or --retract")
+
+    films = []
+    if args.films:
+        with open(args.films, 'r', encoding='utf-8') as f:
+            films = json.load(f)
+    result = aggregates.ingest(films, retract=args.retract, dataset=args.dataset)
+    print(f"{args.dataset}: +{result['added']} films, -{result['retracted']} films, "
+          f"{result['films']} in total, version {result['version']}")
+
+
+if __name__ == '__main__':
+    main()
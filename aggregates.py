@@ -0,0 +1,355 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+import columnar
+from dataset_store import store as default_store
+from figures import build_in_worker, dumps, radar_chart, stacked_avg_ratings
+import metrics
+from aggregate_state import AggregateState, title_id
+from scheduler import scheduler as default_scheduler
+
+# Bump when the aggregate logic changes so old snapshot files are not reused
+SNAPSHOT_FORMAT = 3
+SNAPSHOT_FILE = 'aggregates_snapshot.json'
+# Dataset whose films the partial states (aggregate_state.AggregateState) are built from
+STATE_DATASET = 'all_known'
+
+
+def film_state(store):
+    """Partial aggregate state of the all_known films, None when the dataset is missing"""
+    films = store.records(STATE_DATASET)
+    return None if films is None else AggregateState.from_films(films)
+
+
+def _round(value):
+    return float(np.round(value, 2))
+
+
+def genre_box_office(state):
+    # Average box office by genre, converted to millions
+    genre_data = [(genre, moments.mean() / 1_000_000) for genre, moments in sorted(state.genres.items())]
+    # Sort by box office and take top 5
+    genre_data.sort(key=lambda item: item[1], reverse=True)
+    genre_data = genre_data[:5]
+    return {
+        'labels': [genre for genre, _ in genre_data],
+        'data': [_round(value) for _, value in genre_data]
+    }
+
+
+def decade_avg_imdb(state):
+    # Keep all decades
+    decades = ['1990s', '2000s', '2010s', '2020s']
+    decade_avg = {decade: None for decade in decades}
+    for decade, moments in state.decades.items():
+        label = f"{decade}s"
+        if label in decade_avg:
+            decade_avg[label] = _round(moments.mean())
+
+    return {
+        'labels': decades,
+        'data': [decade_avg[decade] for decade in decades]
+    }
+
+
+def actor_box_office(state):
+    # Top 5 actors by total box office, keyed by IMDb name ID so namesakes are not merged
+    top = sorted(state.actors.items(), key=lambda item: item[1].total, reverse=True)[:5]
+    return {
+        'labels': [state.actor_names.get(key) for key, _ in top],
+        # Convert to billions
+        'data': [round(moments.total / 1_000_000_000, 2) for _, moments in top]
+    }
+
+
+def imdb_trends(state):
+    # Share of high (> 7), mid (6-7) and low (< 6) rated films per 5-year period
+    result = []
+    for period in sorted(state.periods):
+        moments = state.periods[period]
+        high, mid, low = state.period_levels[period]
+        total = moments.count
+        result.append({
+            "period": period,
+            "high_pct": round(high / total * 100, 2),
+            "mid_pct": round(mid / total * 100, 2),
+            "low_pct": round(low / total * 100, 2),
+            "avg_rating": _round(moments.mean())
+        })
+
+    return result
+
+
+PROFIT_CATEGORIES = [
+    '1. Box Office < Budget',
+    '2. Budget ≤ Box Office < 2x Budget',
+    '3. Box Office ≥ 2x Budget',
+]
+
+
+def profit_categories(state):
+    # Number of films per profit category
+    return {
+        'labels': PROFIT_CATEGORIES,
+        'data': list(state.profit)
+    }
+
+
+def profit_category_codes(box_office, production_budget):
+    """Vectorized categorize_profit: index into PROFIT_CATEGORIES, -1 when a value is missing"""
+    box_office = np.asarray(box_office, dtype=float)
+    production_budget = np.asarray(production_budget, dtype=float)
+    codes = np.where(box_office < production_budget, 0,
+                     np.where(box_office < production_budget * 2, 1, 2))
+    codes[np.isnan(box_office) | np.isnan(production_budget)] = -1
+    return codes
+
+
+def scatter_columns(data, x, y, scale=None):
+    """Split the scatter points into one set of column arrays per profit category.
+
+    Returns a list of (label, xs, ys, titles, links) tuples of numpy arrays,
+    computed in one pass over the frame.
+    """
+    codes = profit_category_codes(data['box_office'], data['production_budget'])
+    points = data[[x, y, 'title', 'link']]
+    keep = (codes >= 0) & points.notna().all(axis=1).to_numpy()
+    codes = codes[keep]
+    points = points[keep]
+
+    # Stable sort keeps the original film order inside every category
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(PROFIT_CATEGORIES) + 1))
+    xs = points[x].to_numpy()[order]
+    ys = points[y].to_numpy()[order]
+    if scale:
+        xs = xs / scale
+        ys = ys / scale
+    titles = points['title'].to_numpy()[order]
+    links = points['link'].to_numpy()[order]
+
+    columns = []
+    for code, category in enumerate(PROFIT_CATEGORIES):
+        part = slice(bounds[code], bounds[code + 1])
+        columns.append((category, xs[part], ys[part], titles[part], links[part]))
+    return columns
+
+
+def scatter_datasets(data, x, y, scale=None):
+    """Build the three profit category scatter datasets as lists of {x, y, title, link} points"""
+    datasets = []
+    for category, xs, ys, titles, links in scatter_columns(data, x, y, scale):
+        datasets.append({
+            'label': category,
+            'data': [
+                {'x': px, 'y': py, 'title': title, 'link': link}
+                for px, py, title, link in zip(xs.tolist(), ys.tolist(), titles.tolist(), links.tolist())
+            ]
+        })
+    return datasets
+
+
+# Aggregates derived from the partial states of the all_known films: name -> payload function
+STATE_AGGREGATES = {
+    'genres': genre_box_office,
+    'decade_hits': decade_avg_imdb,
+    'actors': actor_box_office,
+    'imdb_trends': imdb_trends,
+    'profit_categories': profit_categories,
+}
+# Aggregates computed from the whole datasets: name -> compute function
+AGGREGATES = {
+    'radar_chart': radar_chart,
+    'stacked_avg_ratings': stacked_avg_ratings,
+}
+
+
+class AggregateSnapshot:
+    """Computes every dashboard aggregate once per dataset version and persists them"""
+
+    def __init__(self, store=default_store, snapshot_dir=None, scheduler=None):
+        self.store = store
+        self.snapshot_dir = snapshot_dir
+        # Runs the Plotly figure aggregates in the compute pool (default store only)
+        self.scheduler = scheduler
+        self.version = None
+        self.state = None
+        self.errors = {}
+        self._payloads = {}
+        self._lock = threading.Lock()
+
+    @property
+    def path(self):
+        return os.path.join(self.snapshot_dir or self.store.data_dir, SNAPSHOT_FILE)
+
+    def get(self, name):
+        """Return the materialized payload for an aggregate (None when its data is missing)"""
+        if self.version != self.store.load().version:
+            with metrics.phase('compute'):
+                self.materialize()
+        return self._payloads.get(name)
+
+    def materialize(self):
+        with self._lock:
+            version = self.store.load().version
+            if self.version == version:
+                return self
+            snapshot = self._read_snapshot(version)
+            metrics.cache_event('aggregate_snapshot', 'miss' if snapshot is None else 'hit')
+            errors = {}
+            if snapshot is None:
+                state, errors = self._build_state()
+                payloads, compute_errors = self._compute(state)
+                errors.update(compute_errors)
+                # Only persist complete snapshots, a missing file should not be frozen on disk
+                if not errors and all(payload is not None for payload in payloads.values()):
+                    self._write_snapshot(version, payloads, state)
+            else:
+                payloads, state = snapshot
+            self._payloads = payloads
+            self.state = state
+            self.errors = errors
+            self.version = version
+        return self
+
+    def _build_state(self):
+        try:
+            return film_state(self.store), {}
+        except Exception as e:
+            print(f"Error building the aggregate state: {e}")
+            return None, {'state': str(e)}
+
+    def _compute(self, state, names=None):
+        payloads = {}
+        errors = {}
+        for name in names or list(STATE_AGGREGATES) + list(AGGREGATES):
+            try:
+                if name in STATE_AGGREGATES:
+                    payload = None if state is None else STATE_AGGREGATES[name](state)
+                else:
+                    payload = self._compute_figure(name)
+                # Round-trip through JSON so fresh and restored payloads are identical
+                payloads[name] = None if payload is None else json.loads(dumps(payload))
+            except Exception as e:
+                print(f"Error computing aggregate {name}: {e}")
+                payloads[name] = None
+                errors[name] = str(e)
+        return payloads, errors
+
+    def _compute_figure(self, name):
+        if self.scheduler is None:
+            return AGGREGATES[name](self.store)
+        version = self.store.version
+        with metrics.phase('plotly'):
+            # No timeout: the materialized aggregate is kept for the whole dataset version
+            return self.scheduler.run(('aggregate', name, version), build_in_worker, name, version, {},
+                                      offload=True, timeout=None)
+
+    def ingest(self, films, retract=(), dataset=STATE_DATASET):
+        """Add or replace films and drop retracted ones (by title ID), updating the aggregates.
+
+        Only the STATE_AGGREGATES (partial states) are updated from the added
+        and removed films. The rest stays proportional to the whole dataset:
+        its records are walked, the file is rewritten and reloaded, and the
+        AGGREGATES figures (radar and stacked charts) are rebuilt from the full
+        corpus before the snapshot is saved for the new version. Returns the
+        film counts and the new dataset version.
+        """
+        if dataset not in self.store.datasets:
+            raise ValueError(f"Unknown dataset: {dataset}")
+        self.materialize()
+        with self._lock:
+            # Films with a known title ID replace the stored film, the others are appended
+            incoming = {}
+            appended = []
+            for film in films:
+                key = title_id(film)
+                if key is None:
+                    appended.append(film)
+                else:
+                    incoming[key] = film
+            added = list(incoming.values()) + appended
+            retract = set(retract)
+
+            updated = []
+            removed = []
+            for film in self.store.records(dataset) or ():
+                key = title_id(film)
+                if key in incoming:
+                    removed.append(film)
+                    updated.append(incoming.pop(key))
+                elif key in retract:
+                    removed.append(film)
+                else:
+                    updated.append(film)
+            updated.extend(incoming.values())
+            updated.extend(appended)
+
+            names = list(AGGREGATES)
+            state = self.state
+            if dataset == STATE_DATASET:
+                names += list(STATE_AGGREGATES)
+                if state is not None:
+                    # On a copy: self.state must keep matching the dataset on disk if the write or reload fails
+                    state = AggregateState.from_json(state.to_json()).apply(removed, sign=-1).apply(added)
+
+            self._write_dataset(self.store.path(dataset), updated)
+            version = self.store.reload().version
+            if dataset == STATE_DATASET and state is None:
+                # Nothing to update (the dataset was missing before), build the state once
+                state, _ = self._build_state()
+            payloads, errors = self._compute(state, names)
+            payloads = {**self._payloads, **payloads}
+            if not errors and all(payload is not None for payload in payloads.values()):
+                self._write_snapshot(version, payloads, state)
+            self._payloads = payloads
+            self.state = state
+            self.errors = errors
+            self.version = version
+        return {'added': len(added), 'retracted': len(removed), 'films': len(updated), 'version': version}
+
+    def _write_dataset(self, file_path, films):
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(dumps(films))
+        os.replace(tmp_path, file_path)
+        # A columnar copy would now be older than the JSON, rebuild it so workers keep mapping it
+        if os.path.exists(columnar.columnar_path(file_path)):
+            columnar.convert(file_path)
+
+    def _read_snapshot(self, version):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if snapshot.get('format') != SNAPSHOT_FORMAT or snapshot.get('version') != version:
+            return None
+        payloads = snapshot.get('aggregates', {})
+        if set(payloads) != set(STATE_AGGREGATES) | set(AGGREGATES):
+            return None
+        return payloads, AggregateState.from_json(snapshot.get('state'))
+
+    def _write_snapshot(self, version, payloads, state):
+        snapshot = {
+            'format': SNAPSHOT_FORMAT,
+            'version': version,
+            'aggregates': payloads,
+            # Partial states, so the next ingestion does not start from the whole corpus
+            'state': None if state is None else state.to_json(),
+        }
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f)
+            # Atomic rename so concurrent workers never read a half written file
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Error writing aggregate snapshot {self.path}: {e}")
+
+
+# Shared snapshot used by the Flask app
+aggregates = AggregateSnapshot(scheduler=default_scheduler)
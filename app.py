@@ -1,26 +1,38 @@
-from flask import Flask, jsonify
+from flask import Flask, g, jsonify, request, stream_with_context
 import pandas as pd
-import json
 import numpy as np
 from flask_cors import CORS
-import plotly.io as pio
-import plotly.express as px
-import plotly.graph_objects as go
-from collections import Counter, defaultdict
 import os
+from dataset_store import store
+from aggregates import aggregates, scatter_columns, scatter_datasets
+import wire
+import http_cache
+import static_assets
+import figures
+import metrics
+import indexes
+from indexes import actor_indexes, film_indexes
+from scheduler import ComputeTimeout, scheduler
 
 app = Flask(__name__, static_folder='static', static_url_path='')
 CORS(app)  # Enable CORS to allow frontend requests
-
-# Load and process the movie data
-def load_json_to_df(file_path):
-    try:
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-        return pd.DataFrame(data)
-    except Exception as e:
-        print(f"Error loading {file_path}: {e}")
-        return None
+# Latency/phase histograms and cache counters for every route, served at /metrics
+metrics.init_app(app)
+
+# Parse the datasets once at startup, every endpoint reads the shared copy
+store.load()
+# Dashboard aggregates are computed (or restored from the snapshot file) once per dataset version
+aggregates.materialize()
+# Genre/country/year and actor indexes behind the filtered aggregate and actor endpoints
+film_indexes.get()
+actor_indexes.get()
+# Serialized Plotly figures, built at most once per dataset version; concurrent misses share
+# one build and the previous version is served while a new one is built
+figure_cache = figures.FigureCache(store, scheduler=scheduler)
+# ETag/Cache-Control for the data routes, unchanged resources are answered with 304
+http_cache.init_app(app, store)
+# Hashed, precompressed copies of static/ when `python static_assets.py` has been run
+static_assets.init_app(app)
 
 # Process cast popularity
 def calculate_cast_popularity(cast_list):
@@ -76,363 +88,299 @@ def get_decade(year):
 def serve_index():
     return app.send_static_file('index.html')
 
+def aggregate_response(name):
+    payload = aggregates.get(name)
+    if payload is None:
+        if name in aggregates.errors:
+            return jsonify({'error': aggregates.errors[name]}), 500
+        return jsonify({'error': 'Data not found'}), 404
+    return jsonify(payload)
+
+def parse_filters():
+    # Optional filters of the aggregate endpoints, raises ValueError for malformed values
+    filters = {}
+    for name in ('year_from', 'year_to', 'top', 'bucket'):
+        value = request.args.get(name, '').strip()
+        if not value:
+            continue
+        try:
+            filters[name] = int(value)
+        except ValueError:
+            raise ValueError(f"{name} must be an integer")
+        if name in ('top', 'bucket') and filters[name] < 1:
+            raise ValueError(f"{name} must be positive")
+    if 'year_from' in filters and 'year_to' in filters:
+        # Each bucket of years is a row of the response
+        buckets = (filters['year_to'] - filters['year_from']) // filters.get('bucket', indexes.DEFAULT_TREND_BUCKET) + 1
+        if buckets > indexes.MAX_YEAR_BUCKETS:
+            raise ValueError(f"year range too large, at most {indexes.MAX_YEAR_BUCKETS} buckets")
+    for name in ('genres', 'countries'):
+        values = [value.strip() for value in request.args.get(name, '').split(',') if value.strip()]
+        if values:
+            filters[name] = values
+    return filters
+
+def filtered_response(name, compute):
+    # Without filters the materialized aggregate is served, otherwise the indexes answer
+    try:
+        filters = parse_filters()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not filters:
+        return aggregate_response(name)
+    index = film_indexes.get()
+    if index is None:
+        return jsonify({'error': 'Data not found'}), 404
+    with metrics.phase('compute'):
+        rows = index.select(filters.get('year_from'), filters.get('year_to'),
+                            filters.get('genres'), filters.get('countries'))
+        payload = compute(index, rows, filters)
+    return jsonify(payload)
+
 @app.route('/api/genres', methods=['GET'])
 def get_genre_data():
-    data = load_json_to_df('data_wrangling/data/films_all_known.json')
-    if data is None:
-        return jsonify({'error': 'Data not found'}), 404
-    # Aggregate average box office by genre
-    # Assuming 'genres' is a list of genres for each movie
-    genre_data = data.explode('genres').groupby('genres')['box_office'].mean().reset_index()
-    # Convert box office to millions
-    genre_data['box_office'] = genre_data['box_office'] / 1_000_000
-    # Sort by box office and take top 5
-    genre_data = genre_data.sort_values('box_office', ascending=False).head(5)
-    return jsonify({
-        'labels': genre_data['genres'].tolist(),
-        'data': genre_data['box_office'].round(2).tolist()
-    })
+    # Average box office of the top 5 genres (?top=, ?genres=, ?countries=, ?year_from=, ?year_to=)
+    return filtered_response('genres', lambda index, rows, filters: index.genre_box_office(
+        rows, genres=filters.get('genres'), top=filters.get('top', indexes.DEFAULT_TOP_GENRES)))
 
 @app.route('/api/decade_hits', methods=['GET'])
 def get_decade_avg_imdb():
-    data = load_json_to_df('data_wrangling/data/films_all_known.json')
-    if data is None:
-        return jsonify({'error': 'Data not found'}), 404
-
-    # Calculate decades
-    data['decade'] = data['year'].apply(get_decade)
-    # Group by decades and calculate average IMDb
-    decade_avg_imdb = data.groupby('decade')['imdb'].mean().reset_index()
-
-    # Keep all decades
-    decades = ['1990s', '2000s', '2010s', '2020s']
-    decade_avg = {decade: None for decade in decades}
-    for _, row in decade_avg_imdb.iterrows():
-        if row['decade'] in decade_avg:
-            decade_avg[row['decade']] = round(row['imdb'], 2)
-
-    return jsonify({
-        'labels': decades,
-        'data': [decade_avg[decade] for decade in decades]
-    })
+    # Average IMDb rating per decade (?bucket= years per group plus the filters of /api/genres)
+    return filtered_response('decade_hits', lambda index, rows, filters: index.decade_avg_imdb(
+        rows, bucket=filters.get('bucket', indexes.DEFAULT_DECADE_BUCKET),
+        year_from=filters.get('year_from'), year_to=filters.get('year_to')))
 
 @app.route('/api/actors', methods=['GET'])
 def get_actor_data():
-    data = load_json_to_df('data_wrangling/data/films_all_known.json')
-    if data is None:
+    # Top 5 actors by total box office
+    return aggregate_response('actors')
+
+@app.route('/api/profit_categories', methods=['GET'])
+def get_profit_categories():
+    # Number of films per profit category
+    return aggregate_response('profit_categories')
+
+@app.route('/api/actors/top', methods=['GET'])
+def get_top_actors():
+    # Actors with the highest total of ?metric= (box_office, films, awards, nominations, imdb), ?top= of them
+    metric = request.args.get('metric', 'box_office')
+    if metric not in indexes.ACTOR_METRICS:
+        return jsonify({'error': f"metric must be one of {', '.join(indexes.ACTOR_METRICS)}"}), 400
+    try:
+        top = parse_filters().get('top', indexes.DEFAULT_TOP_ACTORS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    index = actor_indexes.get()
+    if index is None:
         return jsonify({'error': 'Data not found'}), 404
-    # Aggregate total box office by actor
-    actor_data = data.explode('actors').copy()
-
-    def extract_full_name(actor):
-        if not isinstance(actor, dict):
-            return None
-        if 'name' in actor and 'surname' in actor:
-            if f"{actor['name']} {actor['surname']}" == "Robert Jr.":
-                return "Robert Downey Jr."
-            return f"{actor['name']} {actor['surname']}"
-        return None
-
-    actor_data['actor_name'] = actor_data['actors'].apply(extract_full_name)    
-    actor_box_office = actor_data.groupby('actor_name')['box_office'].sum().reset_index()
-    # Convert to billions
-    actor_box_office['box_office'] = actor_box_office['box_office'] / 1_000_000_000
-    # Sort and take top 5
-    actor_box_office = actor_box_office.sort_values('box_office', ascending=False).head(5)
-    return jsonify({
-        'labels': actor_box_office['actor_name'].tolist(),
-        'data': actor_box_office['box_office'].round(2).tolist()
-    })
+    return jsonify(index.top(metric, top))
 
-@app.route('/api/budget_box_office', methods=['GET'])
-def get_budget_box_office_data():
-    data = load_json_to_df('data_wrangling/data/films_all_known.json')
+@app.route('/api/actors/<actor_id>', methods=['GET'])
+def get_actor(actor_id):
+    # Totals and films of one actor by IMDb name ID (nm...)
+    index = actor_indexes.get()
+    if index is None:
+        return jsonify({'error': 'Data not found'}), 404
+    actor = index.actor(actor_id)
+    if actor is None:
+        return jsonify({'error': f"Unknown actor: {actor_id}"}), 404
+    return jsonify(actor)
+
+# Scatter endpoints: name -> (x column, y column, scale)
+SCATTER_AXES = {
+    'budget_box_office': ('production_budget', 'box_office', 1_000_000),
+    'imdb_metascore': ('imdb', 'metascore', None),
+}
+
+def scatter_payload(data, name, response_format=wire.FORMAT_OBJECTS):
+    x, y, scale = SCATTER_AXES[name]
+    with metrics.phase('compute'):
+        if response_format == wire.FORMAT_OBJECTS:
+            return scatter_datasets(data, x, y, scale)
+        return wire.encode_columnar(scatter_columns(data, x, y, scale))
+
+def scatter_response(name):
+    data = store.frame('all_known')
     if data is None:
         return jsonify({'error': 'Data not found'}), 404
+    # Object format by default, columnar/binary when asked for with ?format= or Accept
+    response_format = wire.negotiate_format(request)
+    if response_format is None:
+        return jsonify({'error': f"Unknown format, use one of: {', '.join(wire.MIMETYPES)}"}), 400
+    if response_format == wire.FORMAT_OBJECTS:
+        response = jsonify(scatter_payload(data, name))
+    else:
+        if response_format == wire.FORMAT_COLUMNAR:
+            body = figures.dumps(scatter_payload(data, name, response_format))
+        else:
+            x, y, scale = SCATTER_AXES[name]
+            with metrics.phase('compute'):
+                columns = scatter_columns(data, x, y, scale)
+            with metrics.phase('serialize'):
+                body = wire.encode_binary(columns)
+        response = app.response_class(body, mimetype=wire.MIMETYPES[response_format])
+    response.vary.add('Accept')
+    return response
 
-    # Calculate cast popularity
-    data['profit_category'] = data.apply(categorize_profit, axis=1)
-
-    # Prepare scatter plot data for budget vs box office
-    scatter_data = data[['production_budget', 'box_office', 'profit_category', 'title', 'link']].dropna()
-    # Convert to millions
-    scatter_data['production_budget'] = scatter_data['production_budget'] / 1_000_000
-    scatter_data['box_office'] = scatter_data['box_office'] / 1_000_000
-    # Group by profit category
-    datasets = []
-    for category in ['1. Box Office < Budget', '2. Budget ≤ Box Office < 2x Budget', '3. Box Office ≥ 2x Budget']:
-        category_data = scatter_data[scatter_data['profit_category'] == category]
-        datasets.append({
-            'label': category,
-            'data': [
-                {'x': row['production_budget'], 
-                'y': row['box_office'], 
-                'title': row['title'], 
-                'link': row['link']} for _, row in category_data.iterrows()]
-        })
-    return jsonify(datasets)
+@app.route('/api/budget_box_office', methods=['GET'])
+def get_budget_box_office_data():
+    # Budget vs box office in millions, grouped by profit category
+    return scatter_response('budget_box_office')
 
 @app.route('/api/imdb_metascore', methods=['GET'])
 def get_imdb_metascore_data():
-    data = load_json_to_df('data_wrangling/data/films_all_known.json')
-    if data is None:
+    # IMDb vs Metascore, grouped by profit category
+    return scatter_response('imdb_metascore')
+
+def cached_figure(name, build, **params):
+    # Serialized figures are cached per dataset version, repeat requests skip Plotly entirely
+    return figure_cache.get(name, lambda: build(**params), params)
+
+def timeout_response(name):
+    response = jsonify({'error': f"Timed out building {name}, try again shortly"})
+    response.headers['Retry-After'] = '5'
+    return response, 503
+
+def figure_response(name, build, mimetype='application/json', **params):
+    try:
+        body, fresh = figure_cache.lookup(name, lambda: build(**params), params)
+    except ComputeTimeout:
+        return timeout_response(name)
+    if body is None:
+        if name in aggregates.errors:
+            return jsonify({'error': aggregates.errors[name]}), 500
         return jsonify({'error': 'Data not found'}), 404
-    # Calculate profit category
-    data['profit_category'] = data.apply(categorize_profit, axis=1)
-    # Prepare scatter plot data for IMDb vs Metascore
-    scatter_data = data[['imdb', 'metascore', 'profit_category', 'title', 'link']].dropna()
-    datasets = []
-    for category in ['1. Box Office < Budget', '2. Budget ≤ Box Office < 2x Budget', '3. Box Office ≥ 2x Budget']:
-        category_data = scatter_data[scatter_data['profit_category'] == category]
-        datasets.append({
-            'label': category,
-            'data': [
-                {'x': row['imdb'], 
-                'y': row['metascore'], 
-                'title': row['title'], 
-                'link': row['link']} for _, row in category_data.iterrows()]
-        })
-    return jsonify(datasets)
+    response = app.response_class(body, mimetype=mimetype)
+    if not fresh:
+        # Figure of the previous dataset version: no validators, so it isn't cached as the new one
+        g.pop('http_cache_etag', None)
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def serialized_aggregate(name):
+    payload = aggregates.get(name)
+    return None if payload is None else figures.dumps(payload)
+
+def build_animated_ratings(top_genres):
+    # Plotly construction is CPU bound, it runs in the compute pool instead of a request thread
+    version = store.load().version
+    with metrics.phase('plotly'):
+        html = scheduler.run(('animated_ratings', version, top_genres), figures.build_in_worker,
+                             'animated_ratings', version, {'top_genres': top_genres}, offload=True)
+    return None if html is None else html.encode('utf-8')
 
 @app.route("/animated_ratings")
 def animated_ratings():
-    with open("data_wrangling/data/films_metascore_unknown.json", "r", encoding="utf-8") as f:
-        films = json.load(f)
-
-    genre_counter = Counter()
-    for film in films:
-        if "genres" in film:
-            genre_counter.update(film["genres"])
-
-    top_10_genres = {genre for genre, _ in genre_counter.most_common(10)}
-
-    data = []
-    for film in films:
-        if "genres" in film and film["imdb"] and film["metascore"]:
-            imdb_rounded = round(film["imdb"] * 2) / 2
-            metascore_rounded = round(film["metascore"] / 5) * 5
-            for genre in film["genres"]:
-                if genre in top_10_genres:
-                    data.append({"genre": genre, "rating_type": "IMDb", "score": imdb_rounded})
-                    data.append({"genre": genre, "rating_type": "Metascore", "score": metascore_rounded / 10})
-
-    df = pd.DataFrame(data)
-
-    fig = px.histogram(
-        df,
-        x="score",
-        color="rating_type",
-        barmode="group",
-        animation_frame="genre",
-        title=" ",
-        labels={"score": "Rating ", "count": "Number of films"},
-        color_discrete_map={"IMDb": "#ff0073", "Metascore": "#7401ff"},
-        template='none'
-    )
-
-    fig.update_layout(
-        xaxis_title="Rating",
-        yaxis_title="Number of films",
-        title_font_size=24,  # Increased from 20
-        font=dict(size=18, color="#EAEAEA"),  # Increased from 14
-        bargap=0.1,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        xaxis_showgrid=False,
-        yaxis_showgrid=False,
-        xaxis_showline=False,
-        yaxis_showline=False,
-        transition={'duration': 500, 'easing': 'cubic-in-out'}
-    )
-    return fig.to_html(full_html=False, config={'displayModeBar': False})
+    # Histogram of IMDb vs Metascore ratings, one animation frame per top genre
+    return figure_response('animated_ratings', build_animated_ratings, mimetype='text/html', top_genres=10)
 
 @app.route("/api/stacked_avg_ratings")
 def stacked_avg_ratings():
-    try:
-        with open("data_wrangling/data/films_metascore_unknown.json", "r", encoding="utf-8") as f:
-            films = json.load(f)
-
-        genre_counter = Counter()
-        for film in films:
-            if "genres" in film:
-                genre_counter.update(film["genres"])
-
-        top_20_genres = [genre for genre, _ in genre_counter.most_common(20)]  # Сохраняем порядок
-
-        genre_ratings = {genre: {"imdb": [], "metascore": []} for genre in top_20_genres}
-
-        for film in films:
-            if "genres" in film and film["imdb"] and film["metascore"]:
-                for genre in film["genres"]:
-                    if genre in top_20_genres:
-                        genre_ratings[genre]["imdb"].append(film["imdb"])
-                        genre_ratings[genre]["metascore"].append(film["metascore"])
-
-        genre_list = []
-        imdb_list = []
-        metascore_list = []
-
-        for genre in top_20_genres:
-            imdb_scores = genre_ratings[genre]["imdb"]
-            metascore_scores = genre_ratings[genre]["metascore"]
-            if imdb_scores and metascore_scores:
-                genre_list.append(genre)
-                # Calculate original average values - no rescaling needed
-                avg_imdb = sum(imdb_scores) / len(imdb_scores)
-                avg_metascore = sum(metascore_scores) / len(metascore_scores) / 10  # Convert to 0-10 scale
-                
-                imdb_list.append(round(avg_imdb, 2))
-                metascore_list.append(round(avg_metascore, 2))
-
-        # Create the figure with the data traces
-        fig = go.Figure(data=[
-            go.Bar(name="IMDb", x=genre_list, y=imdb_list, marker_color="#ff0073"),
-            go.Bar(name="Metascore(scaled)", x=genre_list, y=metascore_list, marker_color="#7401ff")
-        ])
-
-        fig.update_layout(
-            barmode="group",
-            title=" ",
-            xaxis_title="Genre",
-            yaxis_title="Average rating",
-            template="plotly_dark",
-            font=dict(size=18),
-            yaxis=dict(
-                range=[1, 10],
-                dtick=1,
-                tickfont=dict(size=16),
-                title=dict(text="Average rating", font=dict(size=20))
-            ),
-            xaxis=dict(
-                tickangle=45,
-                tickfont=dict(size=16),
-                title=dict(text="Genre", font=dict(size=20))
-            ),
-            legend=dict(
-                font=dict(size=18)
-            ),
-            margin=dict(l=60, r=60, t=60, b=120)
-        )
-
-        return {
-            "data": fig.to_dict()["data"],
-            "layout": fig.to_dict()["layout"]
-        }
-    except Exception as e:
-        app.logger.error(f"Error in /api/stacked_avg_ratings: {e}")
-        return {"error": str(e)}, 500
+    # Average IMDb and scaled Metascore of the top 20 genres
+    return figure_response('stacked_avg_ratings', lambda: serialized_aggregate('stacked_avg_ratings'))
 
 @app.route("/api/radar_chart")
 def radar_chart():
-    try:
-        # Data loading
-        with open("data_wrangling/data/films_all_known.json", "r", encoding="utf-8") as f:
-            films = json.load(f)
-
-        # Genre grouping
-        genre_revenue = defaultdict(list)
-        genre_budget = defaultdict(list)
-
-        for film in films:
-            if not film.get("genres"):
-                continue
-
-            for genre in film["genres"]:
-                if film.get("box_office"):
-                    genre_revenue[genre].append(film["box_office"])
-                if film.get("production_budget"):
-                    genre_budget[genre].append(film["production_budget"])
-
-        # Calculating of mean values
-        avg_revenue = {genre: np.mean(values) for genre, values in genre_revenue.items()}
-        avg_budget = {genre: np.mean(values) for genre, values in genre_budget.items()}
-
-        # Concatenation to DataFrame
-        genres = sorted(set(avg_budget.keys()))
-        combined_data = [
-            {
-                "Genre": genre,
-                "Avg Box Office": avg_revenue.get(genre, 0),
-                "Avg Budget": avg_budget.get(genre, 0)
-            }
-            for genre in genres
-        ]
-
-        df_combined = pd.DataFrame(combined_data)
-        df_combined = df_combined.sort_values("Avg Budget", ascending=False)
-
-        # Continue with radar plot
-        fig = go.Figure()
-
-        fig.add_trace(go.Scatterpolar(
-            r=df_combined["Avg Box Office"].tolist(),
-            theta=df_combined["Genre"].tolist(),
-            fill='toself',
-            name='Avg Box Office',
-            line=dict(color='#08D9D6', width=8),  # Thicker line
-            marker=dict(color='#08D9D6', size=16)  # Bigger points
-        ))
-
-        fig.add_trace(go.Scatterpolar(
-            r=df_combined["Avg Budget"].tolist(),
-            theta=df_combined["Genre"].tolist(),
-            fill='toself',
-            name='Avg Budget',
-            line=dict(color='#FF2E63', width=8),  # Thicker line
-            marker=dict(color='#FF2E63', size=16)  # Bigger points
-        ))
-
-        fig.update_layout(
-            template="plotly_dark",
-            paper_bgcolor="#000000",
-            plot_bgcolor="#000000",
-            font=dict(size=18, color="#EAEAEA"),  # Bigger font
-            legend=dict(font=dict(size=20)),  # Bigger legend
-            polar=dict(
-                bgcolor="black",
-                radialaxis=dict(visible=True, color="white", tickfont=dict(size=16)),  # Bigger ticks
-                angularaxis=dict(color="white", tickfont=dict(size=16))  # Bigger ticks
-            ),
-            showlegend=True,
-            title=" "
-        )
-
-        return fig.to_json()
-
-    except Exception as e:
-        return f"Error: {e}", 500
+    # Average budget and box office per genre
+    return figure_response('radar_chart', lambda: serialized_aggregate('radar_chart'))
 
 @app.route("/api/imdb_trends")
 def imdb_trends():
-    with open("data_wrangling/data/films_all_known.json", "r", encoding="utf-8") as f:
-        films = json.load(f)
-
-    # Data Preparation
-    data = []
-    for film in films:
-        if film.get("imdb") and film.get("year"):
-            data.append({"year": film["year"], "imdb": film["imdb"]})
-
-    df = pd.DataFrame(data)
-    df["period"] = (df["year"] // 5) * 5
-
-    result = []
-    for period, group in df.groupby("period"):
-        total = len(group)
-        high = len(group[group["imdb"] > 7.0]) / total * 100
-        mid = len(group[(group["imdb"] >= 6) & (group["imdb"] <= 7.0)]) / total * 100
-        low = len(group[group["imdb"] < 6]) / total * 100
-        avg = group["imdb"].mean()
-        result.append({
-            "period": period,
-            "high_pct": round(high, 2),
-            "mid_pct": round(mid, 2),
-            "low_pct": round(low, 2),
-            "avg_rating": round(avg, 2)
-        })
-
-    return jsonify(result)
+    # Share of high/mid/low rated films per 5-year period (?bucket= plus the filters of /api/genres)
+    return filtered_response('imdb_trends', lambda index, rows, filters: index.imdb_trends(
+        rows, bucket=filters.get('bucket', indexes.DEFAULT_TREND_BUCKET)))
+
+# Sections of /api/dashboard, named after the endpoints they replace
+DASHBOARD_SECTIONS = ['genres', 'decade_hits', 'actors', 'budget_box_office', 'imdb_metascore',
+                      'stacked_avg_ratings', 'radar_chart', 'imdb_trends', 'animated_ratings']
+
+def dashboard_section(name, data, response_format):
+    """Serialized JSON of one dashboard section, None when its data is missing.
+
+    Raises ComputeTimeout when a figure section takes longer than COMPUTE_TIMEOUT.
+    """
+    if name in SCATTER_AXES:
+        return None if data is None else figures.dumps(scatter_payload(data, name, response_format))
+    if name == 'animated_ratings':
+        html = cached_figure('animated_ratings', build_animated_ratings, top_genres=10)
+        return None if html is None else figures.dumps(html.decode('utf-8'))
+    if name in ('stacked_avg_ratings', 'radar_chart'):
+        return cached_figure(name, lambda: serialized_aggregate(name))
+    return serialized_aggregate(name)
+
+@app.route('/api/dashboard', methods=['GET'])
+def dashboard():
+    # Any subset of the chart payloads in one response: ?sections=genres,actors&format=columnar&stream=1
+    requested = request.args.get('sections')
+    names = [name.strip() for name in requested.split(',') if name.strip()] if requested else DASHBOARD_SECTIONS
+    unknown = [name for name in names if name not in DASHBOARD_SECTIONS]
+    if unknown:
+        return jsonify({'error': f"Unknown sections: {', '.join(unknown)}"}), 400
+    response_format = request.args.get('format', wire.FORMAT_OBJECTS)
+    if response_format not in (wire.FORMAT_OBJECTS, wire.FORMAT_COLUMNAR):
+        return jsonify({'error': f"Unknown format, use {wire.FORMAT_OBJECTS} or {wire.FORMAT_COLUMNAR}"}), 400
+
+    # Every section is computed from the same loaded dataset
+    version = store.load().version
+    data = store.frame('all_known')
+
+    if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        # One JSON document per line, written as soon as the section is ready
+        def generate():
+            yield figures.dumps({'version': version}) + b'\n'
+            for name in names:
+                try:
+                    body = dashboard_section(name, data, response_format)
+                except ComputeTimeout:
+                    # The status is already sent, the slow section is left empty
+                    app.logger.warning(f"Timed out building dashboard section {name}")
+                    body = None
+                yield b'{"section":' + figures.dumps(name) + b',"data":' + (body or b'null') + b'}\n'
+        return app.response_class(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    try:
+        sections = [
+            figures.dumps(name) + b':' + (dashboard_section(name, data, response_format) or b'null')
+            for name in names
+        ]
+    except ComputeTimeout:
+        return timeout_response('the dashboard')
+    body = b'{"version":' + figures.dumps(version) + b',"sections":{' + b','.join(sections) + b'}}'
+    return app.response_class(body, mimetype='application/json')
+
+# Health checks and warm-up
+
+def warm_up():
+    """Run every data route once so the aggregates and figure caches are filled before serving"""
+    client = app.test_client()
+    for rule in app.url_map.iter_rules():
+        if rule.arguments or 'GET' not in rule.methods or not http_cache.is_cached_route(rule.rule):
+            continue
+        response = client.get(rule.rule)
+        if response.status_code != 200:
+            app.logger.warning(f"Warm-up of {rule.rule} returned {response.status_code}")
+        response.close()
+    app.config['WARMED_UP'] = True
+
+@app.route('/healthz')
+def healthz():
+    # Liveness: the process is up and answering
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz')
+def readyz():
+    # Readiness: datasets loaded, aggregates current and caches warmed
+    info = store.info() if store.loaded else {'version': None, 'datasets': {}}
+    checks = {
+        'datasets_loaded': store.loaded and all(rows is not None for rows in info['datasets'].values()),
+        'aggregates_current': store.loaded and aggregates.version == store.version,
+        'warmed_up': app.config.get('WARMED_UP', False),
+    }
+    ready = all(checks.values())
+    return jsonify({'status': 'ready' if ready else 'not ready', 'checks': checks, **info}), 200 if ready else 503
 
 if __name__ == '__main__':
+    # Development server; production runs gunicorn with gunicorn.conf.py (see the Dockerfile)
+    warm_up()
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
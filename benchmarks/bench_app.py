@@ -0,0 +1,242 @@
+"""Time the app startup, every route and the app.py helpers on a film corpus.
+
+Run from the repository root:
+
+    python benchmarks/bench_app.py --size 4k 100k          # generates missing corpora first
+    python benchmarks/bench_app.py --data-dir data_wrangling/data --output results.json
+    python benchmarks/bench_app.py --size 4k --compare benchmarks/results/4k.json
+
+Results are written as JSON (benchmarks/results/<size>.json by default).
+--compare prints the ratio to an earlier result (fastest runs) and exits
+with status 1 when a timing got slower than --threshold times the old one
+and by more than --min-delta seconds.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARKS_DIR)
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, 'results')
+sys.path.insert(0, ROOT_DIR)
+
+from generate_corpus import CORPUS_DIR, SIZES, generate  # noqa: E402
+
+# Requests timed on top of every parameterless GET route
+VARIANTS = [
+    '/api/genres?year_from=2000&year_to=2009&countries=France,Japan',
+    '/api/decade_hits?bucket=5',
+    '/api/imdb_trends?genres=Drama',
+    '/api/budget_box_office?format=columnar',
+    '/api/budget_box_office?format=binary',
+    '/api/imdb_metascore?format=columnar',
+    '/api/actors/top?metric=imdb&top=20',
+    '/api/dashboard?format=columnar',
+    '/api/dashboard?stream=1',
+]
+# Routes that are not worth timing
+SKIPPED_ROUTES = ('/<path:filename>', '/metrics')
+
+
+def timed(func, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return timings, result
+
+
+def summary(timings):
+    return {
+        'min_s': min(timings),
+        'median_s': statistics.median(timings),
+        'max_s': max(timings),
+        'runs': len(timings),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def request_paths(app, store):
+    paths = []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        if 'GET' not in rule.methods or rule.rule in SKIPPED_ROUTES:
+            continue
+        if rule.arguments == {'actor_id'}:
+            # The most frequent actor of the corpus
+            films = store.records('all_known') or ()
+            counts = {}
+            for film in films:
+                for actor in film.get('actors') or []:
+                    counts[actor.get('id')] = counts.get(actor.get('id'), 0) + 1
+            if counts:
+                paths.append(rule.rule.replace('<actor_id>', max(counts, key=counts.get)))
+        elif not rule.arguments:
+            paths.append(rule.rule)
+    return paths + VARIANTS
+
+
+def bench_routes(app, store, repeat):
+    client = app.test_client()
+    results = {}
+    for path in request_paths(app, store):
+        # First request: fills the aggregate/figure/index caches behind the route
+        start = time.perf_counter()
+        response = client.get(path)
+        body = response.get_data()
+        cold = time.perf_counter() - start
+        timings, _ = timed(lambda: client.get(path).get_data(), repeat)
+        results[path] = {'status': response.status_code, 'bytes': len(body), 'cold_s': cold, **summary(timings)}
+        print(f"  {path:<70} {response.status_code} {cold:>9.4f} {results[path]['median_s']:>9.4f}")
+    return results
+
+
+def bench_helpers(app_module, store, repeat, sample):
+    data = store.frame('all_known')
+    if sample and len(data) > sample:
+        data = data.head(sample)
+    helpers = {
+        'categorize_profit': lambda: data.apply(app_module.categorize_profit, axis=1),
+        'get_decade': lambda: data['year'].apply(app_module.get_decade),
+        'calculate_cast_popularity': lambda: data['actors'].apply(app_module.calculate_cast_popularity),
+    }
+    results = {}
+    for name, func in helpers.items():
+        timings, _ = timed(func, repeat)
+        results[name] = {'rows': len(data), 'per_row_us': min(timings) / max(len(data), 1) * 1e6, **summary(timings)}
+        print(f"  {name:<70} {results[name]['median_s']:>9.4f} s for {len(data)} rows")
+    return results
+
+
+def run(data_dir, repeat, helper_sample):
+    """Benchmark the app on the datasets in data_dir (the app is imported here, once per process)"""
+    os.environ['DATA_DIR'] = data_dir
+    # Startup without a stored snapshot: every aggregate is computed
+    snapshot = os.path.join(data_dir, 'aggregates_snapshot.json')
+    if os.path.exists(snapshot):
+        os.remove(snapshot)
+
+    start = time.perf_counter()
+    import app as app_module
+    startup = time.perf_counter() - start
+    store = app_module.store
+    info = store.info()
+    print(f"{data_dir}: {info['datasets']} films, startup {startup:.2f} s")
+
+    routes = bench_routes(app_module.app, store, repeat)
+    helpers = bench_helpers(app_module, store, repeat, helper_sample)
+    app_module.scheduler.shutdown()
+
+    import numpy
+    import pandas
+    return {
+        'meta': {
+            'data_dir': data_dir,
+            'datasets': info['datasets'],
+            'sources': info['sources'],
+            'commit': git_commit(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'pandas': pandas.__version__,
+            'numpy': numpy.__version__,
+            'repeat': repeat,
+        },
+        'startup_s': startup,
+        'routes': routes,
+        'helpers': helpers,
+    }
+
+
+def compare(result, baseline, threshold, min_delta):
+    """Print the timing ratios to a baseline and return the names that got slower than threshold"""
+    regressions = []
+    rows = [('startup', baseline.get('startup_s'), result['startup_s'])]
+    for section in ('routes', 'helpers'):
+        for name, timing in result[section].items():
+            old = baseline.get(section, {}).get(name)
+            # The fastest run is the least noisy
+            rows.append((name, old and old['min_s'], timing['min_s']))
+    print(f"{'':<72} {'old s':>9} {'new s':>9} {'ratio':>6}")
+    for name, old, new in rows:
+        if not old:
+            print(f"{name:<72} {'-':>9} {new:>9.4f} {'-':>6}")
+            continue
+        ratio = new / old
+        # Sub-millisecond differences are jitter, whatever their ratio
+        slower = ratio > threshold and new - old > min_delta
+        print(f"{name:<72} {old:>9.4f} {new:>9.4f} {ratio:>5.2f}x{'  SLOWER' if slower else ''}")
+        if slower:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the app routes and helpers")
+    parser.add_argument('--size', nargs='*', choices=sorted(SIZES), default=[],
+                        help="generated corpora to run on (created when missing)")
+    parser.add_argument('--data-dir', help="benchmark an existing datasets folder instead")
+    parser.add_argument('--output', help="result file (default: benchmarks/results/<size>.json)")
+    parser.add_argument('--repeat', type=int, default=5, help="warm runs per route and helper")
+    parser.add_argument('--helper-sample', type=int, default=100_000,
+                        help="films passed to the row-by-row helpers (0 for all)")
+    parser.add_argument('--compare', help="earlier result file to compare with")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="slowdown ratio reported as a regression")
+    parser.add_argument('--min-delta', type=float, default=0.002,
+                        help="seconds a timing must grow by to count as a regression")
+    args = parser.parse_args()
+
+    if len(args.size) > 1:
+        # The app reads its datasets at import, so every corpus runs in its own process
+        status = 0
+        for size in args.size:
+            command = [sys.executable, __file__, '--size', size, '--repeat', str(args.repeat),
+                       '--helper-sample', str(args.helper_sample), '--threshold', str(args.threshold),
+                       '--min-delta', str(args.min_delta)]
+            status = max(status, subprocess.run(command).returncode)
+        sys.exit(status)
+
+    if args.data_dir:
+        data_dir = os.path.abspath(args.data_dir)
+        output = args.output or os.path.join(RESULTS_DIR, os.path.basename(data_dir.rstrip(os.sep)) + '.json')
+    elif args.size:
+        size = args.size[0]
+        data_dir = os.path.join(CORPUS_DIR, size)
+        if not os.path.exists(os.path.join(data_dir, 'films_all_known.json')):
+            print(f"Generating the {size} corpus in {data_dir}")
+            generate(SIZES[size], data_dir)
+        output = args.output or os.path.join(RESULTS_DIR, f"{size}.json")
+    else:
+        parser.error("pass --size or --data-dir")
+
+    # Read before running, the output may be the file compared with
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    result = run(data_dir, args.repeat, args.helper_sample)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {output}")
+
+    if baseline is not None and compare(result, baseline, args.threshold, args.min_delta):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Compare the old row-by-row scatter payload path with the vectorized one.
+
+Run from the repository root:
+
+    python benchmarks/bench_scatter.py --rows 1000 10000 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aggregates import PROFIT_CATEGORIES, scatter_datasets  # noqa: E402
+from app import categorize_profit  # noqa: E402
+
+
+def make_films(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    budget = rng.integers(1, 300, rows) * 1_000_000.0
+    box_office = budget * rng.lognormal(0.3, 0.9, rows)
+    # Roughly every tenth film has no known budget
+    budget[rng.random(rows) < 0.1] = np.nan
+    return pd.DataFrame({
+        'title': [f"Film {i}" for i in range(rows)],
+        'link': [f"https://www.imdb.com/title/tt{i:07d}/" for i in range(rows)],
+        'production_budget': budget,
+        'box_office': box_office,
+        'imdb': rng.uniform(3, 9, rows).round(1),
+        'metascore': rng.integers(20, 100, rows),
+    })
+
+
+def legacy_scatter_datasets(data, x, y, scale=None):
+    # The previous implementation: apply(axis=1) plus iterrows per category
+    data = data.copy()
+    data['profit_category'] = data.apply(categorize_profit, axis=1)
+    scatter_data = data[[x, y, 'profit_category', 'title', 'link']].dropna()
+    if scale:
+        scatter_data[x] = scatter_data[x] / scale
+        scatter_data[y] = scatter_data[y] / scale
+    datasets = []
+    for category in PROFIT_CATEGORIES:
+        category_data = scatter_data[scatter_data['profit_category'] == category]
+        datasets.append({
+            'label': category,
+            'data': [
+                {'x': row[x], 'y': row[y], 'title': row['title'], 'link': row['link']}
+                for _, row in category_data.iterrows()]
+        })
+    return datasets
+
+
+def best_time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-legacy-above', type=int, default=100_000,
+                        help="don't time the legacy path for larger frames")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'legacy s':>10} {'vectorized s':>13} {'speedup':>8}")
+    for rows in args.rows:
+        data = make_films(rows)
+        new_time, new_result = best_time(
+            lambda: scatter_datasets(data, 'production_budget', 'box_office', scale=1_000_000), args.repeat)
+        if rows > args.skip_legacy_above:
+            print(f"{rows:>10} {'-':>10} {new_time:>13.4f} {'-':>8}")
+            continue
+        old_time, old_result = best_time(
+            lambda: legacy_scatter_datasets(data, 'production_budget', 'box_office', scale=1_000_000), 1)
+        assert old_result == new_result, "vectorized output differs from the legacy output"
+        print(f"{rows:>10} {old_time:>10.4f} {new_time:>13.4f} {old_time / new_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
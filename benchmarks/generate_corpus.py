@@ -0,0 +1,171 @@
+"""Generate synthetic film datasets with the schema of data_wrangling/data.
+
+Writes films_all_known.json (every field known) and films_metascore_unknown.json
+(the same films plus about a quarter more without a Metascore), like
+data_preparation.ipynb does for the scraped data:
+
+    python benchmarks/generate_corpus.py --size 4k 100k 1m
+    python benchmarks/generate_corpus.py --films 25000 --output /tmp/films
+
+Genres, countries and cast members follow skewed (Zipf-like) popularity,
+budgets and box office are log-normal, ratings are correlated. Films are
+generated and written in chunks, so the 1M corpus does not have to fit in
+memory as Python objects.
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_DIR = os.path.join(BENCHMARKS_DIR, 'corpus')
+
+SIZES = {'4k': 4_000, '100k': 100_000, '1m': 1_000_000}
+# Share of extra films (metascore unknown) on top of the all_known ones
+METASCORE_UNKNOWN_SHARE = 0.25
+CHUNK = 20_000
+
+# Roughly ordered by how often they appear on IMDb
+GENRES = ['Drama', 'Comedy', 'Action', 'Thriller', 'Crime', 'Romance', 'Adventure', 'Horror',
+          'Mystery', 'Biography', 'Fantasy', 'Sci-Fi', 'Family', 'History', 'Animation', 'War',
+          'Music', 'Sport', 'Musical', 'Western', 'Documentary', 'Film-Noir']
+COUNTRIES = ['United States', 'United Kingdom', 'France', 'Canada', 'Germany', 'India', 'Japan',
+             'Spain', 'Italy', 'Australia', 'South Korea', 'China', 'Hong Kong', 'Mexico', 'Sweden',
+             'Denmark', 'Ireland', 'Belgium', 'Brazil', 'New Zealand', 'Russia', 'Norway']
+FIRST_NAMES = ['James', 'John', 'Robert', 'Michael', 'David', 'Mary', 'Emma', 'Sarah', 'Anna', 'Tom',
+               'Chris', 'Kate', 'Laura', 'Daniel', 'Paul', 'Mark', 'Julia', 'Peter', 'Olivia', 'Sam']
+SURNAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Miller', 'Davis', 'Wilson', 'Moore',
+            'Taylor', 'Anderson', 'Thomas', 'Jackson', 'White', 'Harris', 'Martin', 'Thompson',
+            'Garcia', 'Clark', 'Lewis', 'Walker', 'Hall', 'Young', 'King', 'Wright', 'Scott']
+
+
+def zipf_weights(count, exponent=1.1):
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+
+class Actors:
+    """Pool of cast members; a few appear in many films, most in one or two"""
+
+    def __init__(self, films, rng):
+        self.count = max(50, films * 5)
+        self.weights = zipf_weights(self.count, 0.5)
+        first = rng.integers(0, len(FIRST_NAMES), self.count)
+        last = rng.integers(0, len(SURNAMES), self.count)
+        # Same names on purpose: namesakes must stay apart by their IMDb ID
+        self.names = [FIRST_NAMES[i] for i in first]
+        self.surnames = [SURNAMES[i] for i in last]
+        # IMDb STARmeter rank, roughly following how often an actor appears; 0 when unknown
+        ranks = np.argsort(np.argsort(-self.weights + rng.normal(0, self.weights.std() * 0.5, self.count))) + 1
+        ranks[rng.random(self.count) < 0.15] = 0
+        self.popularity = ranks.tolist()
+
+    def cast(self, position):
+        actor_id = f"nm{position + 1_000_000:07d}"
+        return {
+            'name': self.names[position],
+            'surname': self.surnames[position],
+            'popularity': self.popularity[position],
+            'url': f"https://www.imdb.com/name/{actor_id}/",
+            'id': actor_id,
+        }
+
+
+def pick(rng, weights, counts):
+    """For each film, `count` distinct items drawn with the given weights"""
+    drawn = rng.choice(len(weights), size=(len(counts), counts.max()), p=weights)
+    return [list(dict.fromkeys(row[:count].tolist())) for row, count in zip(drawn, counts)]
+
+
+def make_films(start, rows, rng, actors, metascore_known=True):
+    """One chunk of film dicts with IDs start..start+rows-1"""
+    # More films in recent years
+    year = np.clip(np.round(2024 - rng.gamma(2.0, 9.0, rows)), 1920, 2024).astype(int)
+    imdb = np.clip(rng.normal(6.4, 1.0, rows), 1.5, 9.6).round(1)
+    metascore = np.clip(np.round(imdb * 10 - 8 + rng.normal(0, 12, rows)), 5, 100).astype(int)
+    budget = np.round(np.exp(rng.normal(16.8, 1.3, rows)) / 100_000) * 100_000
+    budget = np.maximum(budget, 100_000).astype(np.int64)
+    box_office = np.round(budget * np.exp(rng.normal(0.4, 1.1, rows))).astype(np.int64)
+    nominations = rng.negative_binomial(1, 0.12, rows)
+    awards = rng.binomial(nominations, 0.35)
+
+    genres = pick(rng, zipf_weights(len(GENRES), 0.8), rng.integers(1, 4, rows))
+    countries = pick(rng, zipf_weights(len(COUNTRIES), 1.4), rng.choice([1, 1, 1, 2, 2, 3], rows))
+    casts = pick(rng, actors.weights, rng.integers(5, 16, rows))
+
+    films = []
+    for i in range(rows):
+        number = start + i
+        films.append({
+            'title': f"Film {number}",
+            'year': int(year[i]),
+            'imdb': float(imdb[i]),
+            'link': f"https://www.imdb.com/title/tt{number + 100_000:07d}/",
+            'film_type': 'TV Movie' if number % 40 == 0 else '',
+            'directors': [f"Director {number % 7_919}"],
+            'countries': [COUNTRIES[c] for c in countries[i]],
+            'production_budget': int(budget[i]),
+            'box_office': int(box_office[i]),
+            'metascore': int(metascore[i]) if metascore_known else None,
+            'num_of_awards': int(awards[i]),
+            'num_of_nominations': int(nominations[i]),
+            'genres': [GENRES[g] for g in genres[i]],
+            'actors': [actors.cast(a) for a in casts[i]],
+        })
+    return films
+
+
+def generate(films, output_dir, seed=0):
+    """Write both datasets for `films` all_known films into output_dir"""
+    os.makedirs(output_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    actors = Actors(films, rng)
+    extra = int(films * METASCORE_UNKNOWN_SHARE)
+    all_known_path = os.path.join(output_dir, 'films_all_known.json')
+    metascore_unknown_path = os.path.join(output_dir, 'films_metascore_unknown.json')
+
+    with open(all_known_path, 'w', encoding='utf-8') as known, \
+            open(metascore_unknown_path, 'w', encoding='utf-8') as unknown:
+        known.write('[')
+        unknown.write('[')
+        for start in range(0, films + extra, CHUNK):
+            end = min(start + CHUNK, films + extra)
+            # metascore_unknown holds every all_known film plus the extra ones
+            for number in (range(start, min(end, films)), range(max(start, films), end)):
+                if not len(number):
+                    continue
+                metascore_known = number.start < films
+                chunk = make_films(number.start, len(number), rng, actors, metascore_known)
+                lines = [json.dumps(film, ensure_ascii=False) for film in chunk]
+                text = ',\n'.join(lines)
+                if metascore_known:
+                    known.write(('\n' if number.start == 0 else ',\n') + text)
+                unknown.write(('\n' if number.start == 0 else ',\n') + text)
+        known.write('\n]\n')
+        unknown.write('\n]\n')
+    return all_known_path, metascore_unknown_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic film datasets for the benchmarks")
+    parser.add_argument('--size', nargs='*', choices=sorted(SIZES), default=[],
+                        help=f"preset corpus sizes, written to {CORPUS_DIR}/<size>")
+    parser.add_argument('--films', type=int, help="custom number of all_known films")
+    parser.add_argument('--output', help="output folder for --films")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    targets = [(SIZES[size], os.path.join(CORPUS_DIR, size)) for size in args.size]
+    if args.films:
+        targets.append((args.films, args.output or os.path.join(CORPUS_DIR, str(args.films))))
+    if not targets:
+        parser.error("pass --size and/or --films")
+    for films, output_dir in targets:
+        paths = generate(films, output_dir, seed=args.seed)
+        sizes = ', '.join(f"{os.path.basename(p)} {os.path.getsize(p) / 1e6:.1f} MB" for p in paths)
+        print(f"{films} films -> {output_dir} ({sizes})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+"""Binary columnar copies of the film datasets that can be memory-mapped.
+
+Convert the JSON datasets (written next to them as *.fcol):
+
+    python columnar.py                      # every films_*.json in DATA_DIR
+    python columnar.py path/to/films.json   # selected files
+
+File layout: b'FCOL', uint32 format version, uint64 header length, a JSON
+header describing the columns, then the column buffers, each aligned to 64
+bytes. Numeric columns are stored as raw little-endian arrays and are
+mapped straight into the DataFrame, so every process reading the same file
+shares one copy of them in the OS page cache. Strings are UTF-8 data plus
+int64 offsets, or int32 codes into such a dictionary when values repeat
+(genres, countries, actor names); lists (genres, countries, actors, ...) are int64 offsets into
+a flattened child column; list items that are dicts (actors) become one
+child column per key.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b'FCOL'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+PREFIX = struct.Struct('<4sIQ')
+EXTENSION = '.fcol'
+
+
+def columnar_path(json_path):
+    return os.path.splitext(json_path)[0] + EXTENSION
+
+
+def _align(offset):
+    return offset + (-offset % ALIGNMENT)
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+class _Buffers:
+    """Collects column buffers and hands out their (offset, length) in the data section"""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def add(self, array):
+        data = np.ascontiguousarray(array).tobytes()
+        offset = _align(self.size)
+        if offset > self.size:
+            self.chunks.append(b'\0' * (offset - self.size))
+        self.chunks.append(data)
+        self.size = offset + len(data)
+        return [offset, len(data)]
+
+
+def _validity(values, buffers):
+    valid = np.fromiter((not _is_missing(v) for v in values), dtype=np.uint8, count=len(values))
+    return None if valid.all() else buffers.add(valid)
+
+
+def _encode_values(values, buffers):
+    """Describe and store a list of Python values, picking the tightest column kind"""
+    present = [v for v in values if not _is_missing(v)]
+    valid = _validity(values, buffers)
+
+    if not present:
+        return {'kind': 'null', 'length': len(values)}
+    if all(isinstance(v, list) for v in present):
+        lengths = np.array([0 if _is_missing(v) else len(v) for v in values], dtype='<i8')
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype('<i8')
+        flat = [item for v in values if not _is_missing(v) for item in v]
+        return {'kind': 'list', 'offsets': buffers.add(offsets), 'valid': valid,
+                'child': _encode_values(flat, buffers)}
+    if all(isinstance(v, dict) for v in present):
+        keys = list(dict.fromkeys(key for v in present for key in v))
+        fields = {
+            key: _encode_values([None if _is_missing(v) else v.get(key) for v in values], buffers)
+            for key in keys
+        }
+        return {'kind': 'struct', 'valid': valid, 'fields': fields}
+    if all(isinstance(v, str) for v in present):
+        return _encode_strings(values, valid, buffers)
+    if all(isinstance(v, bool) for v in present):
+        data = np.array([bool(v) if not _is_missing(v) else False for v in values], dtype=np.uint8)
+        return {'kind': 'bool', 'data': buffers.add(data), 'valid': valid}
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        dtype = '<i8' if all(isinstance(v, int) for v in present) else '<f8'
+        data = np.array([0 if _is_missing(v) else v for v in values], dtype=dtype)
+        return {'kind': 'number', 'dtype': dtype, 'data': buffers.add(data), 'valid': valid}
+    # Mixed values are kept as JSON text
+    encoded = [None if _is_missing(v) else json.dumps(v) for v in values]
+    description = _encode_strings(encoded, valid, buffers)
+    description['kind'] = 'json'
+    return description
+
+
+def _encode_strings(values, valid, buffers):
+    # Repetitive columns (genres, countries, actor names) are dictionary encoded
+    dictionary = {}
+    codes = np.fromiter((dictionary.setdefault('' if _is_missing(v) else v, len(dictionary)) for v in values),
+                        dtype='<i4', count=len(values))
+    if len(dictionary) <= len(values) // 2:
+        return {'kind': 'string', 'codes': buffers.add(codes), 'valid': valid, 'size': len(dictionary),
+                'dictionary': _encode_strings(list(dictionary), None, buffers)}
+    encoded = [b'' if _is_missing(v) else v.encode('utf-8') for v in values]
+    lengths = np.fromiter((len(v) for v in encoded), dtype='<i8', count=len(encoded))
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).astype('<i8')
+    data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    return {'kind': 'string', 'offsets': buffers.add(offsets), 'data': buffers.add(data), 'valid': valid}
+
+
+def _encode_column(column, buffers):
+    # Numeric frame columns are stored as they are so they can be mapped back zero-copy
+    if column.dtype.kind in 'iufb':
+        data = column.to_numpy()
+        dtype = data.dtype.newbyteorder('<').str
+        return {'kind': 'array', 'dtype': dtype, 'data': buffers.add(data.astype(dtype, copy=False))}
+    return _encode_values(column.tolist(), buffers)
+
+
+def write_columnar(frame, path, source=None):
+    """Write a normalized DataFrame (see dataset_store.normalize_films) to path"""
+    buffers = _Buffers()
+    columns = [[name, _encode_column(frame[name], buffers)] for name in frame.columns]
+    header = json.dumps({
+        'format': FORMAT_VERSION,
+        'rows': int(len(frame)),
+        'source': source or {},
+        'columns': columns,
+    }).encode('utf-8')
+    data_start = _align(PREFIX.size + len(header))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(PREFIX.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        f.write(b'\0' * (data_start - PREFIX.size - len(header)))
+        for chunk in buffers.chunks:
+            f.write(chunk)
+    os.replace(tmp_path, path)
+
+
+class _Reader:
+    def __init__(self, buffer, data_start):
+        self.buffer = buffer
+        self.data_start = data_start
+
+    def array(self, ref, dtype):
+        offset, length = ref
+        dtype = np.dtype(dtype)
+        return np.frombuffer(self.buffer, dtype=dtype, count=length // dtype.itemsize,
+                             offset=self.data_start + offset)
+
+    def bytes(self, ref):
+        offset, length = ref
+        start = self.data_start + offset
+        return self.buffer[start:start + length]
+
+    def values(self, description, length):
+        """Decode a column description back into a list of Python values"""
+        kind = description['kind']
+        valid = None if description.get('valid') is None else self.array(description['valid'], np.uint8)
+        if kind == 'null':
+            return [None] * length
+        if kind == 'list':
+            offsets = self.array(description['offsets'], '<i8').tolist()
+            child = self.values(description['child'], offsets[-1])
+            values = [child[offsets[i]:offsets[i + 1]] for i in range(length)]
+        elif kind == 'struct':
+            fields = {key: self.values(field, length) for key, field in description['fields'].items()}
+            keys = list(fields)
+            values = [dict(zip(keys, row)) for row in zip(*fields.values())] if keys else [{} for _ in range(length)]
+        elif kind in ('string', 'json'):
+            values = self.strings(description, length)
+            if kind == 'json':
+                values = [json.loads(v) if v else None for v in values]
+        elif kind == 'bool':
+            values = self.array(description['data'], np.uint8).astype(bool).tolist()
+        elif kind == 'number':
+            values = self.array(description['data'], description['dtype']).tolist()
+        else:
+            raise ValueError(f"Unknown column kind: {kind}")
+        if valid is not None:
+            values = [value if ok else None for value, ok in zip(values, valid.tolist())]
+        return values
+
+    def strings(self, description, length):
+        if 'dictionary' in description:
+            codes = self.array(description['codes'], '<i4')
+            dictionary = np.empty(description['size'], dtype=object)
+            dictionary[:] = self.strings(description['dictionary'], len(dictionary))
+            return dictionary[codes].tolist()
+        offsets = self.array(description['offsets'], '<i8').tolist()
+        data = self.bytes(description['data'])
+        text = data.decode('utf-8')
+        if len(text) != len(data):
+            # Byte offsets only match character offsets for ASCII text
+            return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(length)]
+        return [text[start:end] for start, end in zip(offsets, offsets[1:])]
+
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        magic, version, header_length = PREFIX.unpack(f.read(PREFIX.size))
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a format {FORMAT_VERSION} columnar file")
+        return json.loads(f.read(header_length))
+
+
+def read_columnar(path):
+    """Memory-map a columnar file and return (DataFrame, header).
+
+    Numeric columns are read-only views of the mapping; string and list
+    columns are decoded into Python objects.
+    """
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, header_length = PREFIX.unpack_from(buffer, 0)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a format {FORMAT_VERSION} columnar file")
+    header = json.loads(buffer[PREFIX.size:PREFIX.size + header_length])
+    reader = _Reader(buffer, _align(PREFIX.size + header_length))
+    rows = header['rows']
+
+    data = {}
+    for name, description in header['columns']:
+        if description['kind'] == 'array':
+            data[name] = reader.array(description['data'], description['dtype'])
+        else:
+            values = reader.values(description, rows)
+            column = np.empty(rows, dtype=object)
+            column[:] = values
+            data[name] = column
+    # copy=False keeps the mapped arrays as separate blocks instead of consolidating them
+    return pd.DataFrame(data, copy=False), header
+
+
+def convert(json_path, output_path=None):
+    """Compile one JSON dataset into its columnar file"""
+    # Imported here so the module does not depend on the app package at import time
+    from dataset_store import normalize_films
+
+    with open(json_path, 'rb') as f:
+        raw = f.read()
+    frame = normalize_films(json.loads(raw))
+    output_path = output_path or columnar_path(json_path)
+    source = {'file': os.path.basename(json_path), 'sha256': hashlib.sha256(raw).hexdigest()}
+    write_columnar(frame, output_path, source)
+    return output_path, len(frame)
+
+
+def main():
+    from dataset_store import DATA_DIR
+
+    parser = argparse.ArgumentParser(description="Convert film JSON datasets to the columnar format")
+    parser.add_argument('files', nargs='*', help=f"JSON files (default: {DATA_DIR}/films_*.json)")
+    args = parser.parse_args()
+    files = args.files or sorted(glob.glob(os.path.join(DATA_DIR, 'films_*.json')))
+    if not files:
+        parser.error(f"no films_*.json files found in {DATA_DIR}")
+    for json_path in files:
+        output_path, rows = convert(json_path)
+        print(f"{json_path}: {rows} films -> {output_path} ({os.path.getsize(output_path)} bytes)")
+
+
+if __name__ == '__main__':
+    main()
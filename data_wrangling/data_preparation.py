@@ -0,0 +1,230 @@
+"""Clean the scraped films and split them by which values are known, in one streaming pass.
+
+Does what the cleaning cells of data_preparation.ipynb did. Run it from the data_wrangling folder:
+
+    python data_preparation.py                                   # data/films_data.json -> data/films_*.json
+    python data_preparation.py films_data.json --output-dir data
+
+or call prepare() from Python. The input (a JSON list, or one film per line)
+is read incrementally: genres outside VALID_GENRES are dropped, films failing
+is_valid_film are skipped, and each remaining film is written straight to
+the output files it belongs to. Every films_<x>_unknown.json holds the
+all_known films followed by the films where only <x> is missing, like before;
+those extra films are spilled to a temporary file until the all_known ones
+are written, so memory use doesn't grow with the corpus.
+"""
+import argparse
+import json
+import os
+import tempfile
+
+# Main genres
+VALID_GENRES = {
+    "Action", "Adventure", "Animation", "Biography", "Comedy", "Documentary", "Drama", "Crime",
+    "Family", "Fantasy", "Game-Show", "History", "Music", "Horror", "Musical", "Mystery",
+    "Reality-TV", "Romance", "Short", "News", "Sci-Fi", "Sport", "Talk-Show",
+    "War", "Thriller", "Western", "Film-Noir"
+}
+REQUIRED_FIELDS = ("year", "countries", "num_of_awards", "num_of_nominations", "genres", "actors")
+VALID_FILM_TYPES = ("", "TV Movie")
+
+# Output split -> the only value allowed to be missing (None: every value known)
+SPLITS = {
+    "all_known": None,
+    "imdb_unknown": "imdb",
+    "metascore_unknown": "metascore",
+    "budget_unknown": "production_budget",
+    "box_office_unknown": "box_office",
+}
+SCORE_FIELDS = ("imdb", "metascore", "production_budget", "box_office")
+
+CHUNK_SIZE = 1 << 20
+# A film larger than this is taken for a broken file rather than read to the end
+MAX_RECORD_SIZE = 64 << 20
+# Literals and number characters a chunk boundary can cut, which the decoder
+# then reports before the end of the buffer
+LITERALS = ("true", "false", "null", "NaN", "Infinity", "-Infinity")
+NUMBER_CHARS = "0123456789+-.eE"
+
+
+def clean_genres(film):
+    """Keep only the main genres (first occurrence, in the scraped order)"""
+    if "genres" in film:
+        film["genres"] = list(dict.fromkeys(genre for genre in film["genres"] if genre in VALID_GENRES))
+    return film
+
+
+def is_valid_film(film):
+    if any(film.get(field) in (None, [], "") for field in REQUIRED_FIELDS):
+        return False
+    if film.get("film_type") not in VALID_FILM_TYPES:
+        return False
+    return True
+
+
+def split_of(film):
+    """Output split of a valid film, None when more than one score is missing"""
+    missing = [field for field in SCORE_FIELDS if film.get(field) is None]
+    if not missing:
+        return "all_known"
+    if len(missing) == 1:
+        return next(name for name, field in SPLITS.items() if field == missing[0])
+    return None
+
+
+def is_truncated(error, buffer):
+    """Whether the decode error is the end of the buffer cutting a film short"""
+    if error.pos >= len(buffer) - 1 or error.msg.startswith("Unterminated string"):
+        return True
+    rest = buffer[error.pos:]
+    if error.msg.startswith("Invalid \\uXXXX escape"):
+        return len(rest) <= len("uXXXX")
+    return not rest.strip(NUMBER_CHARS) or any(literal.startswith(rest) for literal in LITERALS)
+
+
+def iter_films(path, chunk_size=CHUNK_SIZE):
+    """Films of a JSON list (or of whitespace separated JSON objects), decoded one at a time"""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = f.read(chunk_size)
+        pos = len(buffer) - len(buffer.lstrip())
+        in_list = buffer[pos:pos + 1] == "["
+        if in_list:
+            pos += 1
+        while True:
+            # Skip whitespace and, inside a list, the separators
+            while pos < len(buffer) and (buffer[pos].isspace() or (in_list and buffer[pos] == ",")):
+                pos += 1
+            if pos == len(buffer):
+                more = f.read(chunk_size)
+                if not more:
+                    if in_list:
+                        raise ValueError(f"{path}: the film list is not closed")
+                    return
+                buffer, pos = more, 0
+                continue
+            if in_list and buffer[pos] == "]":
+                return
+            try:
+                film, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                if not is_truncated(e, buffer):
+                    raise
+                if len(buffer) - pos > MAX_RECORD_SIZE:
+                    raise ValueError(f"{path}: a film is larger than {MAX_RECORD_SIZE} characters") from e
+                # The film continues in the next chunk
+                more = f.read(chunk_size)
+                if not more:
+                    raise
+                buffer, pos = buffer[pos:] + more, 0
+                continue
+            yield film
+            pos = end
+            if pos >= chunk_size:
+                buffer, pos = buffer[pos:], 0
+
+
+def _element(film):
+    # Same layout as json.dump(films, f, indent=4, ensure_ascii=False)
+    text = json.dumps(film, indent=4, ensure_ascii=False)
+    return "\n    " + text.replace("\n", "\n    ")
+
+
+class JsonListWriter:
+    """Writes a JSON list one film at a time to path, replacing it only when closed"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._tmp_path = path + ".tmp"
+        self._file = open(self._tmp_path, "w", encoding="utf-8")
+        self._file.write("[")
+
+    def write(self, element):
+        """Add a film formatted by _element()"""
+        self._file.write(("," if self.count else "") + element)
+        self.count += 1
+
+    def append_spill(self, spill, count):
+        """Add the elements of a spill file (each written with a leading comma)"""
+        if not count:
+            return
+        spill.seek(0)
+        if not self.count:
+            spill.read(1)
+        while True:
+            chunk = spill.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            self._file.write(chunk)
+        self.count += count
+
+    def close(self):
+        self._file.write("\n]" if self.count else "]")
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """Drop the partial output, the previous file (if any) stays"""
+        if not self._file.closed:
+            self._file.close()
+            os.remove(self._tmp_path)
+
+
+def prepare(input_path="data/films_data.json", output_dir="data", chunk_size=CHUNK_SIZE):
+    """Clean, filter and split the films of input_path into output_dir/films_<split>.json, return the counts"""
+    os.makedirs(output_dir, exist_ok=True)
+    writers = {name: JsonListWriter(os.path.join(output_dir, f"films_{name}.json")) for name in SPLITS}
+    spills = {name: tempfile.TemporaryFile("w+", encoding="utf-8", dir=output_dir)
+              for name in SPLITS if name != "all_known"}
+    spilled = dict.fromkeys(spills, 0)
+    counts = {"read": 0, "invalid": 0, "unsplit": 0}
+    try:
+        for film in iter_films(input_path, chunk_size):
+            counts["read"] += 1
+            clean_genres(film)
+            if not is_valid_film(film):
+                counts["invalid"] += 1
+                continue
+            split = split_of(film)
+            if split is None:
+                counts["unsplit"] += 1
+            elif split == "all_known":
+                # The all_known films head every split, formatted once for all of them
+                element = _element(film)
+                for writer in writers.values():
+                    writer.write(element)
+            else:
+                spills[split].write("," + _element(film))
+                spilled[split] += 1
+
+        for name, spill in spills.items():
+            writers[name].append_spill(spill, spilled[name])
+        for writer in writers.values():
+            writer.close()
+    except BaseException:
+        for writer in writers.values():
+            writer.abort()
+        raise
+    finally:
+        for spill in spills.values():
+            spill.close()
+
+    counts.update({name: writer.count for name, writer in writers.items()})
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean the scraped films and split them into the datasets")
+    parser.add_argument("input", nargs="?", default="data/films_data.json", help="scraped films (JSON list)")
+    parser.add_argument("--output-dir", default="data", help="folder for the films_*.json datasets")
+    args = parser.parse_args()
+    counts = prepare(args.input, args.output_dir)
+    print(f"Read {counts['read']} films: {counts['invalid']} invalid, "
+          f"{counts['unsplit']} with several values unknown")
+    for name in SPLITS:
+        print(f"  films_{name}.json: {counts[name]} films")
+
+
+if __name__ == "__main__":
+    main()
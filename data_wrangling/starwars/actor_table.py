@@ -0,0 +1,68 @@
+"""Actor popularity (IMDb StarMeter rank) kept across crawls.
+
+The table maps IMDb name IDs to {"name", "surname", "url",
+"popularity": rank, "fetched_at": unix time} and is saved as JSON next to
+the films (actors_data.json). Actors fetched less than `ttl` seconds ago
+are not requested again. Films are not patched when an actor page
+arrives: resolve() fills the popularity of every cast member in one pass
+when the crawl ends.
+"""
+import json
+import os
+import time
+
+# Seconds an actor's popularity is reused before the actor page is fetched again
+ACTOR_TTL = 86400
+
+
+class ActorTable:
+    def __init__(self, path, ttl=ACTOR_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.actors = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.actors = json.load(f)
+
+    def __len__(self):
+        return len(self.actors)
+
+    def is_fresh(self, actor_id):
+        actor = self.actors.get(actor_id)
+        return actor is not None and time.time() - actor['fetched_at'] < self.ttl
+
+    def popularity(self, actor_id):
+        actor = self.actors.get(actor_id)
+        return actor['popularity'] if actor else None
+
+    def set(self, actor_id, popularity, **details):
+        """Record a fetched popularity, with the name, surname and url of the actor when given"""
+        self.actors[actor_id] = {**details, 'popularity': popularity, 'fetched_at': time.time()}
+
+    def update(self, other):
+        """Add the actors of another table, the most recent fetch of an actor wins"""
+        for actor_id, actor in other.actors.items():
+            own = self.actors.get(actor_id)
+            if own is None or own['fetched_at'] < actor['fetched_at']:
+                self.actors[actor_id] = actor
+        return self
+
+    def resolve(self, films):
+        """Set the popularity of every known cast member of the films, return the films changed"""
+        changed = []
+        for film in films:
+            updated = False
+            for actor in film.get('actors') or []:
+                popularity = self.popularity(actor.get('id'))
+                if popularity is not None and actor.get('popularity') != popularity:
+                    actor['popularity'] = popularity
+                    updated = True
+            if updated:
+                changed.append(film)
+        return changed
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.actors, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,185 @@
+"""Append-only store for the films of a crawl, keyed by IMDb title ID.
+
+Every update of a film is appended as one JSON line to a journal next to
+the output file (films_data.json -> films_data.journal.jsonl) instead of
+rewriting the whole output. The journal is fsynced in batches. Loading the
+store reads the last compacted output and replays the journal over it, so
+an interrupted crawl loses at most the last unsynced batch.
+
+Records can mark an enrichment stage of the film as done (put(film, stage)).
+The time of each stage is kept next to the output (films_data.progress.json)
+so a restarted crawl can skip the films that are already complete.
+
+compact() writes the latest version of every film to the output file and
+drops the journal. The spider compacts when it closes; a journal left by a
+crashed crawl can be compacted by hand from the data_wrangling folder:
+
+    python -m starwars.crawl_store films_data.json
+"""
+import argparse
+import json
+import os
+import re
+import time
+
+TITLE_ID_PATTERN = re.compile(r'/title/(tt\d+)')
+
+# Journal records written between two fsyncs, and the longest time between them (seconds)
+SYNC_EVERY = 500
+SYNC_INTERVAL = 5.0
+
+
+def title_id(film):
+    """IMDb title ID (tt...) of a film, taken from its link"""
+    match = TITLE_ID_PATTERN.search(film.get('link') or '')
+    return match.group(1) if match else None
+
+
+def film_key(film):
+    # Films without a link keep the title/year key the spider used before
+    return title_id(film) or f"{film.get('title')}_{film.get('year')}"
+
+
+def journal_path(path):
+    return os.path.splitext(path)[0] + '.journal.jsonl'
+
+
+def progress_path(path):
+    return os.path.splitext(path)[0] + '.progress.json'
+
+
+def _write_json(path, data, **kwargs):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, **kwargs)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class CrawlStore:
+    """Films by title ID, persisted as a compacted JSON list plus an append-only journal"""
+
+    def __init__(self, path, sync_every=SYNC_EVERY, sync_interval=SYNC_INTERVAL):
+        self.path = path
+        self.journal_path = journal_path(path)
+        self.progress_path = progress_path(path)
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.films = {}
+        # title ID -> {stage: unix time it was completed}
+        self.progress = {}
+        self._journal = None
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self.load()
+
+    def load(self):
+        """Read the compacted output, then replay the journal over it"""
+        self.films = {}
+        self.progress = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                for film in json.load(f):
+                    self.films[film_key(film)] = film
+        if os.path.exists(self.progress_path):
+            with open(self.progress_path, 'r') as f:
+                self.progress = json.load(f)
+        if os.path.exists(self.journal_path):
+            self._replay()
+        return self
+
+    def _replay(self):
+        valid = 0
+        with open(self.journal_path, 'rb') as f:
+            for line in f:
+                # A torn last record of a crashed crawl is dropped
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self.films[record['id']] = record['film']
+                if record.get('stage'):
+                    self.progress.setdefault(record['id'], {})[record['stage']] = record['at']
+                valid += len(line)
+        if valid < os.path.getsize(self.journal_path):
+            # Cut the torn record so new records start on a line of their own
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(valid)
+
+    def __len__(self):
+        return len(self.films)
+
+    def __iter__(self):
+        return iter(self.films.values())
+
+    def get(self, key):
+        return self.films.get(key)
+
+    def completed_at(self, film, stage):
+        """When the stage was last completed for the film, None if never"""
+        return self.progress.get(film_key(film), {}).get(stage)
+
+    def put(self, film, stage=None):
+        """Record the new version of a film, optionally marking an enrichment stage as done"""
+        key = film_key(film)
+        self.films[key] = film
+        record = {'id': key, 'film': film}
+        if stage:
+            record['stage'] = stage
+            record['at'] = time.time()
+            self.progress.setdefault(key, {})[stage] = record['at']
+        if self._journal is None:
+            self._journal = open(self.journal_path, 'a')
+        self._journal.write(json.dumps(record) + '\n')
+        self._pending += 1
+        if self._pending >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+        return key
+
+    def sync(self):
+        """Flush the journal to disk"""
+        if self._journal is not None and self._pending:
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        self.sync()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def reset(self):
+        """Forget every film, the next compaction replaces the output"""
+        self.close()
+        self.films = {}
+        self.progress = {}
+        for path in (self.journal_path, self.progress_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def compact(self):
+        """Write the latest version of every film to the output file and drop the journal"""
+        self.close()
+        _write_json(self.path, list(self.films.values()), indent=2)
+        _write_json(self.progress_path, self.progress)
+        # Replaying the journal again after a crash here would only rewrite the same films
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        return len(self.films)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact the crawl journal into the films output file")
+    parser.add_argument('output', nargs='?', default='films_data.json', help="output file of the spider")
+    args = parser.parse_args()
+    store = CrawlStore(args.output)
+    print(f"Compacted {store.compact()} films into {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Local stand-in for imdb.com serving the saved HTML pages in starwars/fixtures.
+
+Runs the spider offline against the fixtures (from the data_wrangling folder):
+
+    python -m starwars.fixture_server --port 8765
+    scrapy crawl imdb_film -a mode=collect_http \
+        -a list_url="http://127.0.0.1:8765/search/title/?genres=!documentary,!short"
+    scrapy crawl imdb_film -a mode=enrich -a site_url=http://127.0.0.1:8765
+
+Pages map to fixture files by path:
+
+    /search/title/?start=51  -> search_start_51.html (search_empty.html past the last one)
+    /title/tt0111161/        -> title_tt0111161.html
+    /title/tt0111161/awards/ -> awards_tt0111161.html
+    /name/nm0000209/         -> name_nm0000209.html
+
+Pages are sent with an ETag and Last-Modified (the file's mtime) and answer
+conditional requests with 304 Not Modified, like a caching server would.
+"""
+import argparse
+import hashlib
+import os
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from starwars.httpcache import page_type
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def fixture_name(url):
+    """Fixture file for an IMDb URL (absolute or path only), None when it has no fixture"""
+    parsed = urlparse(url)
+    if parsed.path.rstrip('/') == '/search/title':
+        start = parse_qs(parsed.query).get('start', ['1'])[0]
+        name = f"search_start_{start}.html"
+        if not os.path.exists(os.path.join(FIXTURES_DIR, name)):
+            # Like IMDb, a page past the last result is an empty list
+            name = 'search_empty.html'
+        return name
+    kind, imdb_id = page_type(url)
+    return f"{kind}_{imdb_id}.html" if kind else None
+
+
+def fixture_path(url):
+    name = fixture_name(url)
+    path = name and os.path.join(FIXTURES_DIR, name)
+    return path if path and os.path.exists(path) else None
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = fixture_path(self.path)
+        if path is None:
+            self.send_error(404)
+            return
+        with open(path, 'rb') as f:
+            body = f.read()
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        last_modified = formatdate(os.path.getmtime(path), usegmt=True)
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', last_modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host='127.0.0.1', port=8765):
+    server = ThreadingHTTPServer((host, port), FixtureHandler)
+    print(f"Serving {FIXTURES_DIR} on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the saved IMDb pages for offline crawls")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    serve(args.host, args.port)
+
+
+if __name__ == '__main__':
+    main()
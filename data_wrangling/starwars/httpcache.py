@@ -0,0 +1,150 @@
+"""On-disk HTTP cache for the IMDb film, awards and actor pages of the enrich mode.
+
+Pages are stored in an SQLite file under .scrapy/HTTPCACHE_DIR: an index
+keyed by the page URL (without query string, so ?ref_=... variants share an
+entry) pointing to zlib-compressed bodies addressed by their SHA-256, so an
+unchanged page is never stored twice.
+
+Each page type has its own time to live (HTTPCACHE_PAGE_TTLS, in seconds).
+A stale page is requested again with If-None-Match / If-Modified-Since when
+the cached response had an ETag / Last-Modified header; a 304 answer serves
+the cached body and restarts its time to live.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+import zlib
+from urllib.parse import urlparse
+
+from scrapy.downloadermiddlewares.httpcache import HttpCacheMiddleware
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+from scrapy.utils.project import data_path
+
+# Page type -> URL path pattern (the group is the IMDb title or name ID)
+PAGE_PATTERNS = (
+    ('awards', re.compile(r'^/title/(tt\d+)/awards/?$')),
+    ('title', re.compile(r'^/title/(tt\d+)/?$')),
+    ('name', re.compile(r'^/name/(nm\d+)/?$')),
+)
+# StarMeter ranks move daily, award counts rarely
+DEFAULT_PAGE_TTLS = {
+    'title': 7 * 86400,
+    'awards': 30 * 86400,
+    'name': 86400,
+}
+# Header added to cached responses with the time they were fetched
+FETCHED_AT_HEADER = 'X-Httpcache-Fetched-At'
+
+
+def page_type(url):
+    """(page type, IMDb ID) of a page URL, (None, None) for pages that are not cached"""
+    path = urlparse(url).path
+    for name, pattern in PAGE_PATTERNS:
+        match = pattern.match(path)
+        if match:
+            return name, match.group(1)
+    return None, None
+
+
+def cache_key(url):
+    parsed = urlparse(url)
+    path = parsed.path if parsed.path.endswith('/') else parsed.path + '/'
+    return f"{parsed.netloc}{path}"
+
+
+class ContentAddressedCacheStorage:
+    """HTTPCACHE_STORAGE keeping pages by URL and their bodies by content hash"""
+
+    def __init__(self, settings):
+        self.cachedir = data_path(settings['HTTPCACHE_DIR'], createdir=True)
+        self.db = None
+
+    def open_spider(self, spider):
+        # Shard processes of the same crawl share the cache: short transactions in WAL mode
+        self.db = sqlite3.connect(os.path.join(self.cachedir, f"{spider.name}.sqlite"), timeout=30)
+        self.db.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY, status INTEGER, headers TEXT, body_hash TEXT, fetched_at REAL);
+            CREATE TABLE IF NOT EXISTS bodies (hash TEXT PRIMARY KEY, body BLOB);
+        """)
+
+    def close_spider(self, spider):
+        # Bodies no page points to any more
+        self.db.execute("DELETE FROM bodies WHERE hash NOT IN (SELECT body_hash FROM pages)")
+        self.db.commit()
+        self.db.close()
+        self.db = None
+
+    def retrieve_response(self, spider, request):
+        row = self.db.execute(
+            "SELECT status, headers, body, fetched_at FROM pages JOIN bodies ON hash = body_hash WHERE key = ?",
+            (cache_key(request.url),)).fetchone()
+        if row is None:
+            return None
+        status, headers, body, fetched_at = row
+        headers = Headers(json.loads(headers))
+        headers[FETCHED_AT_HEADER] = str(fetched_at)
+        body = zlib.decompress(body)
+        respcls = responsetypes.from_args(headers=headers, url=request.url, body=body)
+        return respcls(url=request.url, headers=headers, status=status, body=body)
+
+    def store_response(self, spider, request, response):
+        body_hash = hashlib.sha256(response.body).hexdigest()
+        self.db.execute("INSERT OR IGNORE INTO bodies (hash, body) VALUES (?, ?)",
+                        (body_hash, zlib.compress(response.body)))
+        headers = {key.decode('latin1'): [value.decode('latin1') for value in values]
+                   for key, values in response.headers.items()}
+        self.db.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                        (cache_key(request.url), response.status, json.dumps(headers), body_hash, time.time()))
+        self.db.commit()
+
+    def touch(self, request):
+        """Restart the time to live of a page that was revalidated"""
+        self.db.execute("UPDATE pages SET fetched_at = ? WHERE key = ?", (time.time(), cache_key(request.url)))
+        self.db.commit()
+
+
+class PageTypePolicy:
+    """HTTPCACHE_POLICY with a time to live per IMDb page type and conditional revalidation"""
+
+    def __init__(self, settings):
+        self.ttls = {**DEFAULT_PAGE_TTLS, **settings.getdict('HTTPCACHE_PAGE_TTLS')}
+
+    def should_cache_request(self, request):
+        return page_type(request.url)[0] in self.ttls
+
+    def should_cache_response(self, response, request):
+        return response.status == 200
+
+    def is_cached_response_fresh(self, cachedresponse, request):
+        fetched_at = float(cachedresponse.headers.get(FETCHED_AT_HEADER, 0))
+        if time.time() - fetched_at < self.ttls[page_type(request.url)[0]]:
+            return True
+        # Stale: ask the server whether the page changed
+        etag = cachedresponse.headers.get('ETag')
+        last_modified = cachedresponse.headers.get('Last-Modified')
+        if etag:
+            request.headers['If-None-Match'] = etag
+        if last_modified:
+            request.headers['If-Modified-Since'] = last_modified
+        return False
+
+    def is_cached_response_valid(self, cachedresponse, response, request):
+        return response.status == 304
+
+
+class RevalidatingHttpCacheMiddleware(HttpCacheMiddleware):
+    """HttpCacheMiddleware that also restarts the time to live of pages answered with 304"""
+
+    def process_response(self, request, response, spider):
+        revalidated = response.status == 304 and 'cached_response' in request.meta
+        result = super().process_response(request, response, spider)
+        if revalidated and result is not response:
+            self.storage.touch(request)
+        return result
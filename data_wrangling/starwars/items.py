@@ -10,3 +10,30 @@ class StarwarsItem(scrapy.Item):
     # define the fields for your item here like:
     # name = scrapy.Field()
     pass
+
+
+# Define separate items for films and actors
+class Film(scrapy.Item):
+    title = scrapy.Field()
+    year = scrapy.Field()
+    directors = scrapy.Field()
+    countries = scrapy.Field()
+    production_budget = scrapy.Field()
+    box_office = scrapy.Field()
+    imdb = scrapy.Field()
+    metascore = scrapy.Field()
+    num_of_awards = scrapy.Field()
+    num_of_nominations = scrapy.Field()
+    genres = scrapy.Field()
+    actors = scrapy.Field()
+    film_type = scrapy.Field()
+    link = scrapy.Field()
+    # Enrichment stage this version of the film completes ('details', 'awards'), not saved with the film
+    stage = scrapy.Field()
+
+class Actor(scrapy.Item):
+    id = scrapy.Field()
+    name = scrapy.Field()
+    surname = scrapy.Field()
+    popularity = scrapy.Field()
+    url = scrapy.Field()
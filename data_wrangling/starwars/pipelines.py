@@ -3,11 +3,121 @@
 # Don't forget to add your pipeline to the ITEM_PIPELINES setting
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 
+"""Buffer the Film and Actor items of the spider and write them in batches.
+
+Films go to the crawl store of the spider (its journal, compacted into
+films_data.json when the spider closes) and actors to its actor table
+(actors_data.json), so an actor's popularity is stored once instead of in
+every film of its cast. A batch is written when ITEM_BATCH_SIZE items are
+buffered or ITEM_FLUSH_INTERVAL seconds after the previous one: the journal
+is fsynced and the actor table saved once per batch. A batch that fails to
+be written stays buffered for the next flush.
+"""
+import time
 
-# useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
+from twisted.internet import task
+
+from starwars.items import Actor, Film
+
+# Items buffered before a batch is written, and the longest time an item waits in the buffer (seconds)
+ITEM_BATCH_SIZE = 500
+ITEM_FLUSH_INTERVAL = 5.0
 
 
 class StarwarsPipeline:
+    def __init__(self, batch_size=ITEM_BATCH_SIZE, flush_interval=ITEM_FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.films = []
+        self.actors = []
+        self.spider = None
+        self.timer = None
+        # Throughput: items written, batches and the seconds spent writing them
+        self.counts = {'films': 0, 'actors': 0}
+        self.batches = 0
+        self.flush_time = 0.0
+        self.started = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            batch_size=crawler.settings.getint('ITEM_BATCH_SIZE', ITEM_BATCH_SIZE),
+            flush_interval=crawler.settings.getfloat('ITEM_FLUSH_INTERVAL', ITEM_FLUSH_INTERVAL),
+        )
+
+    def open_spider(self, spider):
+        self.spider = spider
+        self.started = time.monotonic()
+        # Writes the buffer of a slow crawl too, not only when items arrive
+        self.timer = task.LoopingCall(self._flush_on_timer)
+        self.timer.start(self.flush_interval, now=False)
+
     def process_item(self, item, spider):
+        if isinstance(item, Film):
+            self.films.append(ItemAdapter(item).asdict())
+        elif isinstance(item, Actor):
+            self.actors.append(ItemAdapter(item).asdict())
+        else:
+            return item
+        if len(self.films) + len(self.actors) >= self.batch_size:
+            self.flush()
         return item
+
+    def flush(self):
+        """Write the buffered films to the crawl store and the actors to the actor table.
+
+        When writing fails the batch is put back in the buffer and the error is raised.
+        """
+        if not self.films and not self.actors:
+            return
+        start = time.monotonic()
+        films, self.films = self.films, []
+        actors, self.actors = self.actors, []
+        try:
+            for film in films:
+                self.spider.store.put({key: value for key, value in film.items() if key != 'stage'},
+                                      film.get('stage'))
+            self.spider.store.sync()
+            if actors:
+                for actor in actors:
+                    details = {key: actor[key] for key in ('name', 'surname', 'url') if key in actor}
+                    self.spider.actors.set(actor['id'], actor['popularity'], **details)
+                self.spider.actors.save()
+        except Exception:
+            # Written again by the next flush: a film or actor recorded twice keeps its latest version
+            self.films = films + self.films
+            self.actors = actors + self.actors
+            raise
+        self.counts['films'] += len(films)
+        self.counts['actors'] += len(actors)
+        self.batches += 1
+        self.flush_time += time.monotonic() - start
+
+    def _flush_on_timer(self):
+        # An error raised here would stop the timer
+        try:
+            self.flush()
+        except Exception as e:
+            self.spider.logger.error(f"Error writing a batch of {len(self.films)} films and "
+                                     f"{len(self.actors)} actors, kept for the next flush: {e}")
+
+    def close_spider(self, spider):
+        # Runs before the spider's closed(), which resolves the actors and compacts the store
+        if self.timer is not None and self.timer.running:
+            self.timer.stop()
+        try:
+            self.flush()
+        finally:
+            self._report(spider)
+
+    def _report(self, spider):
+        elapsed = time.monotonic() - self.started
+        items = self.counts['films'] + self.counts['actors']
+        spider.logger.info(
+            f"Pipeline wrote {self.counts['films']} films and {self.counts['actors']} actors in "
+            f"{self.batches} batches: {items / elapsed if elapsed else 0:.1f} items/s over {elapsed:.1f} s, "
+            f"{items / self.flush_time if self.flush_time else 0:.0f} items/s while writing")
+        for name, count in self.counts.items():
+            spider.crawler.stats.set_value(f'pipeline/{name}', count)
+        spider.crawler.stats.set_value('pipeline/batches', self.batches)
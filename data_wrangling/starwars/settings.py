@@ -50,9 +50,11 @@ ROBOTSTXT_OBEY = True
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
-#DOWNLOADER_MIDDLEWARES = {
+DOWNLOADER_MIDDLEWARES = {
 #    "starwars.middlewares.StarwarsDownloaderMiddleware": 543,
-#}
+    "scrapy.downloadermiddlewares.httpcache.HttpCacheMiddleware": None,
+    "starwars.httpcache.RevalidatingHttpCacheMiddleware": 900,
+}
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
@@ -62,9 +64,13 @@ ROBOTSTXT_OBEY = True
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-#ITEM_PIPELINES = {
-#    "starwars.pipelines.StarwarsPipeline": 300,
-#}
+ITEM_PIPELINES = {
+    "starwars.pipelines.StarwarsPipeline": 300,
+}
+# Film and actor items buffered by the pipeline before they are written, and the longest
+# time (seconds) an item waits in the buffer
+ITEM_BATCH_SIZE = 500
+ITEM_FLUSH_INTERVAL = 5.0
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
@@ -81,11 +87,22 @@ ROBOTSTXT_OBEY = True
 
 # Enable and configure HTTP caching (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#httpcache-middleware-settings
-#HTTPCACHE_ENABLED = True
-#HTTPCACHE_EXPIRATION_SECS = 0
-#HTTPCACHE_DIR = "httpcache"
-#HTTPCACHE_IGNORE_HTTP_CODES = []
-#HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
+# Film, awards and actor pages are cached in .scrapy/httpcache (see starwars/httpcache.py)
+HTTPCACHE_ENABLED = True
+HTTPCACHE_DIR = "httpcache"
+HTTPCACHE_STORAGE = "starwars.httpcache.ContentAddressedCacheStorage"
+HTTPCACHE_POLICY = "starwars.httpcache.PageTypePolicy"
+# Seconds before a cached page is revalidated, per page type
+HTTPCACHE_PAGE_TTLS = {
+    "title": 7 * 86400,
+    "awards": 30 * 86400,
+    "name": 86400,
+}
+# Seconds an actor's stored popularity is reused before the actor page is requested again
+ACTOR_POPULARITY_TTL = 86400
+# Seconds an enriched film (details and awards) is skipped by later enrich crawls, its cast's popularity
+# is refreshed on its own (ACTOR_POPULARITY_TTL)
+ENRICH_TTL = 7 * 86400
 
 # Set settings whose default value is deprecated to a future-proof value
 TWISTED_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
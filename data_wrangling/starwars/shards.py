@@ -0,0 +1,98 @@
+"""Split the enrich crawl by IMDb title ID over several spider processes.
+
+A film belongs to shard `hash(title ID) % shards`. Each shard process reads
+its films from films_data.json once and then works on its own partition
+(films_data.shard-1-of-4.json with its journal and progress, and
+actors_data.shard-1-of-4.json), so a crashed shard restarts where it
+stopped. merge() folds the partitions back into films_data.json and
+actors_data.json. From the data_wrangling folder:
+
+    python -m starwars.shards crawl --shards 4 -- -a site_url=http://127.0.0.1:8765
+    python -m starwars.shards merge --shards 4      # after running the shards by hand:
+    scrapy crawl imdb_film -a mode=enrich -a shard=0 -a shards=4
+"""
+import argparse
+import hashlib
+import os
+import subprocess
+import sys
+
+from starwars.actor_table import ActorTable
+from starwars.crawl_store import CrawlStore
+
+OUTPUT_FILE = 'films_data.json'
+ACTORS_FILE = 'actors_data.json'
+
+
+def shard_of(key, shards):
+    # Stable across processes and runs, unlike hash()
+    return int(hashlib.md5(key.encode()).hexdigest(), 16) % shards
+
+
+def partition_path(path, shard, shards):
+    base, ext = os.path.splitext(path)
+    return f"{base}.shard-{shard}-of-{shards}{ext}"
+
+
+def merge(shards, output=OUTPUT_FILE, actors_file=ACTORS_FILE, keep=False):
+    """Fold the shard partitions into the output and actor files, return the number of films"""
+    store = CrawlStore(output)
+    actors = ActorTable(actors_file)
+    partitions = []
+    for shard in range(shards):
+        path = partition_path(output, shard, shards)
+        partition = CrawlStore(path)
+        for key, film in partition.films.items():
+            store.films[key] = film
+        for key, stages in partition.progress.items():
+            store.progress.setdefault(key, {}).update(stages)
+        actors.update(ActorTable(partition_path(actors_file, shard, shards)))
+        partitions.append(partition)
+
+    actors.resolve(store)
+    actors.save()
+    count = store.compact()
+    if not keep:
+        for partition in partitions:
+            partition.reset()
+            if os.path.exists(partition.path):
+                os.remove(partition.path)
+        for shard in range(shards):
+            path = partition_path(actors_file, shard, shards)
+            if os.path.exists(path):
+                os.remove(path)
+    return count
+
+
+def crawl(shards, scrapy_args=()):
+    """Run one enrich spider process per shard, then merge their partitions"""
+    processes = [
+        subprocess.Popen([sys.executable, '-m', 'scrapy', 'crawl', 'imdb_film', '-a', 'mode=enrich',
+                          '-a', f'shard={shard}', '-a', f'shards={shards}', *scrapy_args])
+        for shard in range(shards)
+    ]
+    failed = [shard for shard, process in enumerate(processes) if process.wait() != 0]
+    if failed:
+        # The partitions are kept, running the shards again resumes them
+        print(f"Shards {failed} failed, not merging")
+        return 1
+    print(f"Merged {merge(shards)} films into {OUTPUT_FILE}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run and merge a sharded enrich crawl",
+                                     epilog="arguments after -- are passed to every scrapy crawl")
+    parser.add_argument('command', choices=['crawl', 'merge'])
+    parser.add_argument('--shards', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--keep', action='store_true', help="keep the partition files after merging")
+    argv = sys.argv[1:]
+    split = argv.index('--') if '--' in argv else len(argv)
+    args = parser.parse_args(argv[:split])
+    if args.command == 'crawl':
+        sys.exit(crawl(args.shards, argv[split + 1:]))
+    print(f"Merged {merge(args.shards, keep=args.keep)} films into {OUTPUT_FILE}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,9 @@
 import scrapy
 import re
-import time
-import json
 import os
+import time
+from urllib.parse import urlparse
+from w3lib.url import add_or_replace_parameter
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
 from webdriver_manager.chrome import ChromeDriverManager
@@ -11,30 +12,14 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from scrapy.selector import Selector
+from lxml import etree
+from parsel.csstranslator import css2xpath
+
+from starwars.actor_table import ACTOR_TTL, ActorTable
+from starwars.crawl_store import SYNC_EVERY, SYNC_INTERVAL, CrawlStore, journal_path
+from starwars.items import Actor, Film
+from starwars.shards import partition_path, shard_of
 
-# Define separate items for films and actors
-class Film(scrapy.Item):
-    title = scrapy.Field()
-    year = scrapy.Field()
-    directors = scrapy.Field()
-    countries = scrapy.Field()
-    production_budget = scrapy.Field()
-    box_office = scrapy.Field()
-    imdb = scrapy.Field()
-    metascore = scrapy.Field()
-    num_of_awards = scrapy.Field()
-    num_of_nominations = scrapy.Field()
-    genres = scrapy.Field()
-    actors = scrapy.Field()
-    film_type = scrapy.Field()
-    link = scrapy.Field()
-
-class Actor(scrapy.Item):
-    id = scrapy.Field()
-    name = scrapy.Field()
-    surname = scrapy.Field()
-    popularity = scrapy.Field()
-    url = scrapy.Field()
 
 class ImdbFilmSpider(scrapy.Spider):
     name = 'imdb_film'
@@ -43,11 +28,56 @@ class ImdbFilmSpider(scrapy.Spider):
     
     # File path for storing film data
     OUTPUT_FILE = 'films_data.json'
+    # Actor popularity kept between crawls
+    ACTORS_FILE = 'actors_data.json'
+    # Seconds an enriched film is skipped by later enrich crawls
+    ENRICH_TTL = 7 * 86400
     
     # Modes of operation
     MODE_COLLECT = 'collect'
+    MODE_COLLECT_HTTP = 'collect_http'
     MODE_ENRICH = 'enrich'
 
+    # Search result entries and the browser-side lookups used to read them incrementally
+    LIST_ITEM_SELECTOR = 'li.ipc-metadata-list-summary-item'
+    COUNT_ITEMS_SCRIPT = "return document.querySelectorAll(arguments[0]).length;"
+    NEW_ITEMS_SCRIPT = (
+        "return Array.from(document.querySelectorAll(arguments[0]))"
+        ".slice(arguments[1]).map(item => item.outerHTML);"
+    )
+    # Seconds to wait for the list to load or grow after a click
+    PAGE_LOAD_TIMEOUT = 10
+    # Search results per page; collect_http requests the pages by their `start` offset
+    RESULTS_PER_PAGE = 50
+
+    # Compiled once instead of on every page: the sections of a film page parse_film_detail reads,
+    # found in a single pass over the document, and the lookups inside them
+    DETAIL_SECTIONS = etree.XPath(
+        '//li[@data-testid="title-pc-principal-credit" or @data-testid="title-details-origin"'
+        ' or @data-testid="title-boxoffice-budget" or @data-testid="title-boxoffice-cumulativeworldwidegross"]'
+        ' | //div[@data-testid="interests" or @data-testid="title-cast-item"]'
+        ' | //span[contains(@class, "metacritic-score-box")]',
+        smart_strings=False)
+    IS_DIRECTOR_CREDIT = etree.XPath('boolean(.//span[contains(text(),"Director")])')
+    NAME_LINK_TEXTS = etree.XPath('.//a[contains(@href, "/name/")]/text()', smart_strings=False)
+    LINK_TEXTS = etree.XPath('.//a/text()', smart_strings=False)
+    ALL_TEXTS = etree.XPath('.//text()', smart_strings=False)
+    OWN_TEXTS = etree.XPath('text()', smart_strings=False)
+    GENRE_TEXTS = etree.XPath('.//span[contains(@class,"ipc-chip__text")]/text()', smart_strings=False)
+    CAST_NAMES = etree.XPath('.//a[contains(@data-testid, "title-cast-item__actor")]/text()', smart_strings=False)
+    CAST_HREFS = etree.XPath('.//a[contains(@data-testid, "title-cast-item__actor")]/@href', smart_strings=False)
+    AWARDS_TEXTS = etree.XPath(css2xpath('div[data-testid="awards-signpost"] div.ipc-signpost__text::text'),
+                               smart_strings=False)
+    STARMETER_TEXTS = etree.XPath(css2xpath('span.starmeter-difference::text'), smart_strings=False)
+
+    RANK_PREFIX_PATTERN = re.compile(r'^\d+\.\s*')
+    YEAR_PATTERN = re.compile(r'(\d{4})')
+    ACTOR_ID_PATTERN = re.compile(r'/name/(nm\d+)/')
+    TITLE_ID_PATTERN = re.compile(r'/title/(tt\d+)/')
+    WINS_PATTERN = re.compile(r'(\d+)\s+wins', re.IGNORECASE)
+    NOMINATIONS_PATTERN = re.compile(r'(\d+)\s+nominations', re.IGNORECASE)
+    MONEY_PATTERN = re.compile(r'\$([\d,]+)')
+
     custom_settings = {
         'USER_AGENT': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/105.0.0.0 Safari/537.36',
         'ROBOTSTXT_OBEY': False,
@@ -69,15 +99,44 @@ class ImdbFilmSpider(scrapy.Spider):
         }
     }
 
-    # Use a dict to track actor IDs and popularity to avoid duplicate actor requests
-    actor_seen = {}
     # Use a set to track collected films to avoid duplicates
     films_seen = set()
     
-    def __init__(self, max_pages=500, mode=MODE_COLLECT, *args, **kwargs):
+    def __init__(self, max_pages=500, mode=MODE_COLLECT, list_url=None, pages_in_flight=4, site_url=None,
+                 shard=None, shards=1, *args, **kwargs):
         super(ImdbFilmSpider, self).__init__(*args, **kwargs)
         self.max_pages = int(max_pages)
         self.mode = mode
+        # Films of this crawl, written by the pipeline (starwars/pipelines.py) and compacted into OUTPUT_FILE when the spider closes
+        self.store = None
+        # Actor popularity (enrich mode) and the actor pages requested during this crawl
+        self.actors = None
+        self.actors_requested = set()
+
+        # Enrich only the films of one shard, in its own partition files (see starwars/shards.py)
+        self.shards = int(shards)
+        self.shard = int(shard) if shard is not None else None
+        self.output_file = self.OUTPUT_FILE
+        self.actors_file = self.ACTORS_FILE
+        if self.shard is not None:
+            self.output_file = partition_path(self.OUTPUT_FILE, self.shard, self.shards)
+            self.actors_file = partition_path(self.ACTORS_FILE, self.shard, self.shards)
+
+        # Another search URL, e.g. the fixture server (python -m starwars.fixture_server)
+        if list_url:
+            self.start_urls = [list_url]
+            self.allowed_domains = self.allowed_domains + [urlparse(list_url).hostname]
+        # Enrich from another copy of the site (e.g. the fixture server) instead of imdb.com
+        self.site_url = site_url.rstrip('/') if site_url else None
+        if self.site_url:
+            self.allowed_domains = self.allowed_domains + [urlparse(self.site_url).hostname]
+
+        if self.mode == self.MODE_COLLECT_HTTP:
+            # Result pages requested at the same time; the window replaces DOWNLOAD_DELAY
+            self.pages_in_flight = int(pages_in_flight)
+            self.download_delay = 0
+            self.next_page = 0
+            self.list_exhausted = False
         
         # Only initialize Selenium if we're in collect mode
         if self.mode == self.MODE_COLLECT:
@@ -96,29 +155,58 @@ class ImdbFilmSpider(scrapy.Spider):
                 options=chrome_options
             )
 
+    def _open_store(self):
+        return CrawlStore(
+            self.output_file,
+            sync_every=self.settings.getint('CRAWL_STORE_SYNC_EVERY', SYNC_EVERY),
+            sync_interval=self.settings.getfloat('CRAWL_STORE_SYNC_INTERVAL', SYNC_INTERVAL),
+        )
+
     def start_requests(self):
         if self.mode == self.MODE_COLLECT:
+            # A new collection replaces the previous output
+            self.store = self._open_store()
+            self.store.reset()
             # Start with the main film list page
             for url in self.start_urls:
                 yield scrapy.Request(url, callback=self.parse_list)
+        elif self.mode == self.MODE_COLLECT_HTTP:
+            self.store = self._open_store()
+            self.store.reset()
+            for _ in range(self.pages_in_flight):
+                yield from self._next_list_page()
         elif self.mode == self.MODE_ENRICH:
-            # Load existing film data and enrich it
-            if os.path.exists(self.OUTPUT_FILE):
-                with open(self.OUTPUT_FILE, 'r') as f:
-                    films_data = json.load(f)
-                    
+            # Load existing film data (and the journal of an interrupted crawl) and enrich it
+            if any(os.path.exists(path) for path in (self.OUTPUT_FILE, journal_path(self.OUTPUT_FILE),
+                                                      journal_path(self.output_file))):
+                self.store = self._open_store()
+                self.actors = ActorTable(self.actors_file, ttl=self.settings.getfloat('ACTOR_POPULARITY_TTL', ACTOR_TTL))
+                if self.shard is not None:
+                    self._open_partition()
+                films_data = list(self.store)
+
                 self.logger.info(f"Loaded {len(films_data)} films for enrichment")
                 
+                ttl = self.settings.getfloat('ENRICH_TTL', self.ENRICH_TTL)
+                skipped = 0
                 for film_data in films_data:
-                    if 'link' in film_data and film_data['link']:
+                    if self._is_enriched(film_data, ttl):
+                        # Checkpointed: only actors whose popularity is unknown or too old are fetched again
+                        skipped += 1
+                        for actor_data in film_data.get('actors') or []:
+                            request = self._actor_request(actor_data)
+                            if request is not None:
+                                yield request
+                    elif 'link' in film_data and film_data['link']:
                         yield scrapy.Request(
-                            url=film_data['link'],
+                            url=self._site_url(film_data['link']),
                             callback=self.parse_film_detail,
                             meta={'film': film_data},
                             dont_filter=True
                         )
                     else:
                         self.logger.warning(f"Film {film_data.get('title')} has no link, skipping")
+                self.logger.info(f"Skipped {skipped} films enriched less than {ttl:.0f} seconds ago")
             else:
                 self.logger.error(f"File {self.OUTPUT_FILE} not found. Run in 'collect' mode first.")
         
@@ -129,51 +217,47 @@ class ImdbFilmSpider(scrapy.Spider):
         self.driver.get(response.url)
         
         # Wait for the page to load
-        WebDriverWait(self.driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "li.ipc-metadata-list-summary-item"))
+        WebDriverWait(self.driver, self.PAGE_LOAD_TIMEOUT).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, self.LIST_ITEM_SELECTOR))
         )
         
         pages_loaded = 0
-        all_films = []
+        # List items already parsed; the page only appends to the list
+        items_parsed = 0
+        films_collected = 0
         
         # Process current page and click "50 more" button repeatedly
         while pages_loaded < self.max_pages:
             # Process current page content
             self.logger.info(f"Processing page {pages_loaded + 1}")
             
-            # Extract films from current page state
-            page_content = self.driver.page_source
-            selector = Selector(text=page_content)
-            
-            # Process new films on current page
+            # Extract only the list items appended since the previous page
+            items = self.driver.execute_script(self.NEW_ITEMS_SCRIPT, self.LIST_ITEM_SELECTOR, items_parsed)
+            items_parsed += len(items)
+            selector = Selector(text=f"<ul>{''.join(items)}</ul>")
             new_films = self._extract_basic_film_data(selector)
-            all_films.extend(new_films)
+            films_collected += len(new_films)
             
-            # Save intermediate results
-            self._save_films(all_films)
+            # The pipeline appends the new films to the crawl store
+            for film in new_films:
+                yield Film(film)
             
             # Try to find and click the "Load more" button
             try:
-                # Scroll to bottom to ensure the button is visible
-                time.sleep(1)
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(1)  # Allow time for the page to settle
-                
                 # Look for the "50 more" button
-                load_more_button = WebDriverWait(self.driver, 10).until(
+                load_more_button = WebDriverWait(self.driver, self.PAGE_LOAD_TIMEOUT).until(
                     EC.presence_of_element_located((By.XPATH, "//button[.//span[contains(text(), '50 more')]]"))
                 )
                 
-                # Scroll specifically to the button
+                # Scroll to the button so the page keeps loading, then click it using JavaScript
                 self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", load_more_button)
-                time.sleep(1)  # Allow time for the scroll
-                
-                # Try to click using JavaScript
                 self.logger.info("Clicking '50 more' button")
                 self.driver.execute_script("arguments[0].click();", load_more_button)
                 
-                # Wait for new content to load
-                time.sleep(3)  # Allow time for content to load
+                # Wait until the new items are in the list instead of sleeping
+                WebDriverWait(self.driver, self.PAGE_LOAD_TIMEOUT).until(
+                    lambda driver: driver.execute_script(self.COUNT_ITEMS_SCRIPT, self.LIST_ITEM_SELECTOR) > items_parsed
+                )
                 
                 pages_loaded += 1
             
@@ -181,15 +265,86 @@ class ImdbFilmSpider(scrapy.Spider):
                 self.logger.info(f"No more '50 more' button found or error: {str(e)}")
                 break
         
-        # Final save and close browser
-        self._save_films(all_films)
+        # Close browser, the films are written out when the spider closes
         self.driver.quit()
         
-        self.logger.info(f"Completed collection of {len(all_films)} films")
+        self.logger.info(f"Completed collection of {films_collected} films")
     
+    def _open_partition(self):
+        # The shard's films come from the full output the first time, its partition files afterwards
+        if not len(self.store):
+            full = CrawlStore(self.OUTPUT_FILE)
+            for key, film in full.films.items():
+                if shard_of(key, self.shards) == self.shard:
+                    self.store.films[key] = film
+                    if key in full.progress:
+                        self.store.progress[key] = full.progress[key]
+            self.store.compact()
+        # Actors fetched by earlier crawls
+        if os.path.exists(self.ACTORS_FILE):
+            self.actors.update(ActorTable(self.ACTORS_FILE))
+
+    def _is_enriched(self, film, ttl):
+        """Details and awards fetched less than ttl seconds ago, as recorded by the crawl store journal"""
+        # Missing or stale actor popularity doesn't make the film page stale: those actors are requested on their own
+        now = time.time()
+        for stage in ('details', 'awards'):
+            completed_at = self.store.completed_at(film, stage)
+            if completed_at is None or now - completed_at >= ttl:
+                return False
+        return True
+
+    def _actor_request(self, actor_data):
+        # Actor pages are fetched once per crawl, and only when the stored popularity is too old
+        actor_id = actor_data.get('id')
+        if not actor_id or actor_id in self.actors_requested or self.actors.is_fresh(actor_id):
+            return None
+        self.actors_requested.add(actor_id)
+        return scrapy.Request(
+            url=self._site_url(actor_data['url']),
+            callback=self.parse_actor,
+            meta={'actor_data': actor_data},
+            dont_filter=True
+        )
+
+    def _site_url(self, url):
+        if not self.site_url:
+            return url
+        parsed = urlparse(url)
+        return self.site_url + parsed.path + (f"?{parsed.query}" if parsed.query else '')
+
+    def _list_page_request(self, page):
+        url = add_or_replace_parameter(self.start_urls[0], 'start', str(page * self.RESULTS_PER_PAGE + 1))
+        return scrapy.Request(url, callback=self.parse_list_page, errback=self.list_page_failed,
+                              meta={'page': page})
+
+    def _next_list_page(self):
+        # Keeps pages_in_flight pages requested until the results run out
+        if self.next_page < self.max_pages and not self.list_exhausted:
+            yield self._list_page_request(self.next_page)
+            self.next_page += 1
+
+    def parse_list_page(self, response):
+        """First phase without a browser: extract basic film data from one search result page"""
+        page = response.meta['page']
+        if not response.css(self.LIST_ITEM_SELECTOR):
+            self.logger.info(f"Page {page + 1} has no results, stopping")
+            self.list_exhausted = True
+            return
+
+        new_films = self._extract_basic_film_data(response)
+        for film in new_films:
+            yield Film(film)
+        self.logger.info(f"Processed page {page + 1}: {len(new_films)} new films")
+        yield from self._next_list_page()
+
+    def list_page_failed(self, failure):
+        self.logger.warning(f"Failed to load page {failure.request.meta['page'] + 1}: {failure.value}")
+        yield from self._next_list_page()
+
     def _extract_basic_film_data(self, response):
         """Extract basic film data from the current page"""
-        films = response.css('li.ipc-metadata-list-summary-item')
+        films = response.css(self.LIST_ITEM_SELECTOR)
         new_films = []
         
         for film in films:
@@ -198,13 +353,13 @@ class ImdbFilmSpider(scrapy.Spider):
             if not raw_title:
                 continue
                 
-            title = re.sub(r'^\d+\.\s*', '', raw_title)
+            title = self.RANK_PREFIX_PATTERN.sub('', raw_title)
 
             # Extract year from metadata
             metadata = film.css('span.dli-title-metadata-item::text').getall()
             year = None
             if metadata:
-                m = re.search(r'(\d{4})', metadata[0])
+                m = self.YEAR_PATTERN.search(metadata[0])
                 if m:
                     year = int(m.group(1))
 
@@ -256,11 +411,16 @@ class ImdbFilmSpider(scrapy.Spider):
         
         return new_films
 
-    def _save_films(self, films):
-        """Save films to JSON file"""
-        with open(self.OUTPUT_FILE, 'w') as f:
-            json.dump(films, f, indent=2)
-        self.logger.info(f"Saved {len(films)} films to {self.OUTPUT_FILE}")
+    def closed(self, reason):
+        """Fill in the actor popularity and compact the crawl store into OUTPUT_FILE"""
+        if self.actors is not None:
+            # One join over all films instead of patching them per actor response
+            changed = self.actors.resolve(self.store)
+            self.actors.save()
+            self.logger.info(f"Resolved actor popularity in {len(changed)} films ({len(self.actors)} actors known)")
+        if self.store is not None:
+            count = self.store.compact()
+            self.logger.info(f"Compacted {count} films into {self.output_file} ({reason})")
 
     def parse_film_detail(self, response):
         """Second phase: Enrich film data with details from its page"""
@@ -271,72 +431,53 @@ class ImdbFilmSpider(scrapy.Spider):
             self.logger.warning(f"Non-200 response for {film.get('title')}; skipping.")
             return
 
-        # Extract directors (remove duplicates)
-        directors = list(set(response.xpath(
-            '//li[@data-testid="title-pc-principal-credit"][.//span[contains(text(),"Director")]]'
-            '//a[contains(@href, "/name/")]/text()'
-        ).getall()))
-        film['directors'] = directors
-
-        # Extract countries
-        film['countries'] = response.xpath('//li[@data-testid="title-details-origin"]//a/text()').getall()
-
-        # Extract production budget and box office using helper
-        film['production_budget'] = self.parse_money(response.xpath('//li[@data-testid="title-boxoffice-budget"]//text()').getall())
-        film['box_office'] = self.parse_money(response.xpath('//li[@data-testid="title-boxoffice-cumulativeworldwidegross"]//text()').getall())
-
-        # Extract metascore
-        metascore_text = response.xpath('//span[contains(@class, "metacritic-score-box")]/text()').get()
-        film['metascore'] = int(metascore_text.strip()) if metascore_text and metascore_text.strip().isdigit() else None
-
-        # Extract genres (using the working structure)
-        film['genres'] = response.xpath('//div[@data-testid="interests"]//span[contains(@class,"ipc-chip__text")]/text()').getall()
-
-        # Extract actors
+        directors = []
+        countries = []
+        budget_texts = None
+        box_office_texts = None
+        metascore_text = None
+        genres = []
         actors = []
-        cast_rows = response.xpath('//div[@data-testid="title-cast-item"]')
-        for row in cast_rows:
-            full_name = row.xpath('.//a[contains(@data-testid, "title-cast-item__actor")]/text()').get()
-            actor_url_relative = row.xpath('.//a[contains(@data-testid, "title-cast-item__actor")]/@href').get()
-            if full_name and actor_url_relative:
-                parts = full_name.split()
-                name = parts[0]
-                surname = parts[-1] if len(parts) > 1 else ''
-                actor_url = response.urljoin(actor_url_relative)
-                actor_id_match = re.search(r'/name/(nm\d+)/', actor_url)
-                actor_id = actor_id_match.group(1) if actor_id_match else None
-                actor_data = {
-                    'name': name,
-                    'surname': surname,
-                    'popularity': 0,  # placeholder
-                    'url': actor_url,
-                    'id': actor_id
-                }
-                actors.append(actor_data)
-                if actor_id and actor_id not in self.actor_seen:
-                    self.actor_seen[actor_id] = 0 # placeholder
-                    yield scrapy.Request(
-                        url=actor_url,
-                        callback=self.parse_actor,
-                        meta={'actor_data': actor_data, 'film': film},
-                        dont_filter=True
-                    )
-                elif actor_id and actor_id in self.actor_seen:
-                    actor_data['popularity'] = self.actor_seen[actor_id]
-                    if film:
-                        for actor in film['actors']:
-                            if actor['id'] == actor_data['id']:
-                                actor['popularity'] = actor_data['popularity']
-                                break
-                        
-                        # Save the updated film data
-                        self._update_film_in_json(film)
+        # One pass over the page, then small lookups inside each section
+        for section in self.DETAIL_SECTIONS(response.selector.root):
+            testid = section.get('data-testid')
+            if testid == 'title-pc-principal-credit':
+                # Directors (duplicates removed below)
+                if self.IS_DIRECTOR_CREDIT(section):
+                    directors.extend(self.NAME_LINK_TEXTS(section))
+            elif testid == 'title-details-origin':
+                countries.extend(self.LINK_TEXTS(section))
+            elif testid == 'title-boxoffice-budget':
+                budget_texts = (budget_texts or []) + self.ALL_TEXTS(section)
+            elif testid == 'title-boxoffice-cumulativeworldwidegross':
+                box_office_texts = (box_office_texts or []) + self.ALL_TEXTS(section)
+            elif testid == 'interests':
+                genres.extend(self.GENRE_TEXTS(section))
+            elif testid == 'title-cast-item':
+                actor_data = self._cast_member(response, section)
+                if actor_data is not None:
+                    actors.append(actor_data)
+                    request = self._actor_request(actor_data)
+                    if request is not None:
+                        yield request
+            elif metascore_text is None:
+                # The first metascore box with a text
+                texts = self.OWN_TEXTS(section)
+                metascore_text = texts[0] if texts else None
 
+        film['directors'] = list(dict.fromkeys(directors))
+        film['countries'] = countries
+        film['production_budget'] = self.parse_money(budget_texts or [])
+        film['box_office'] = self.parse_money(box_office_texts or [])
+        film['metascore'] = int(metascore_text.strip()) if metascore_text and metascore_text.strip().isdigit() else None
+        film['genres'] = genres
         film['actors'] = actors
+        # Checkpoint: the details are done even if the crawl stops before the awards page
+        yield Film(film, stage='details')
 
         # Schedule awards page request
         film_url = response.url
-        film_id_match = re.search(r'/title/(tt\d+)/', film_url)
+        film_id_match = self.TITLE_ID_PATTERN.search(film_url)
         if film_id_match:
             film_id = film_id_match.group(1)
             awards_url = response.urljoin(f'/title/{film_id}/awards/')
@@ -348,69 +489,59 @@ class ImdbFilmSpider(scrapy.Spider):
                 dont_filter=True
             )
         else:
-            # Save the updated film data
-            self._update_film_in_json(film)
+            # No awards page to fetch for this film
+            yield Film(film, stage='awards')
+
+    def _cast_member(self, response, row):
+        """Actor data of a cast row of a film page, None when the row has no actor link"""
+        names = self.CAST_NAMES(row)
+        hrefs = self.CAST_HREFS(row)
+        if not names or not hrefs or not hrefs[0]:
+            return None
+        parts = names[0].split()
+        if not parts:
+            return None
+        actor_url = response.urljoin(hrefs[0])
+        actor_id_match = self.ACTOR_ID_PATTERN.search(actor_url)
+        return {
+            'name': parts[0],
+            'surname': parts[-1] if len(parts) > 1 else '',
+            'popularity': 0,  # placeholder, resolved when the crawl ends
+            'url': actor_url,
+            'id': actor_id_match.group(1) if actor_id_match else None
+        }
 
     def parse_awards(self, response):
         film = response.meta['film']
         self.logger.info(f"Parsing awards for film: {film.get('title')}")
-        awards_text = response.css('div[data-testid="awards-signpost"] div.ipc-signpost__text::text').get()
+        awards_texts = self.AWARDS_TEXTS(response.selector.root)
+        awards_text = awards_texts[0] if awards_texts else None
         wins = 0
         nominations = 0
         if awards_text:
-            wins_match = re.search(r'(\d+)\s+wins', awards_text, re.IGNORECASE)
-            noms_match = re.search(r'(\d+)\s+nominations', awards_text, re.IGNORECASE)
+            wins_match = self.WINS_PATTERN.search(awards_text)
+            noms_match = self.NOMINATIONS_PATTERN.search(awards_text)
             wins = int(wins_match.group(1)) if wins_match else 0
             nominations = int(noms_match.group(1)) if noms_match else 0
         film['num_of_awards'] = wins
         film['num_of_nominations'] = nominations
         
         # Save the updated film data
-        self._update_film_in_json(film)
+        yield Film(film, stage='awards')
 
     def parse_actor(self, response):
         actor_data = response.meta['actor_data']
-        film = response.meta.get('film')
         
-        popularity_text = response.css('span.starmeter-difference::text').get()
+        popularity_texts = self.STARMETER_TEXTS(response.selector.root)
+        popularity_text = popularity_texts[0] if popularity_texts else None
         popularity = int(popularity_text.strip()) if popularity_text and popularity_text.strip().isdigit() else 0
-        actor_data['popularity'] = popularity
-        self.actor_seen[actor_data['id']] = popularity
+        # Stored in the actor table, films get the popularity when the spider closes (ActorTable.resolve)
+        yield Actor({**actor_data, 'popularity': popularity})
         self.logger.info(f"Actor {actor_data['name']} {actor_data['surname']} popularity: {popularity}")
-        
-        # If we have a film reference, update the actor in the film's data
-        if film:
-            for actor in film['actors']:
-                if actor['id'] == actor_data['id']:
-                    actor['popularity'] = popularity
-                    break
-            
-            # Save the updated film data
-            self._update_film_in_json(film)
-
-    def _update_film_in_json(self, updated_film):
-        """Update a specific film in the JSON file"""
-        try:
-            with open(self.OUTPUT_FILE, 'r') as f:
-                films = json.load(f)
-            
-            # Find and update the matching film
-            for i, film in enumerate(films):
-                if film['title'] == updated_film['title'] and film['year'] == updated_film['year']:
-                    films[i] = updated_film
-                    break
-            
-            # Write the updated data back
-            with open(self.OUTPUT_FILE, 'w') as f:
-                json.dump(films, f, indent=2)
-                
-            self.logger.info(f"Updated film: {updated_film['title']}")
-        except Exception as e:
-            self.logger.error(f"Error updating film in JSON: {e}")
 
     def parse_money(self, text_list):
         text = " ".join(text_list).strip()
-        match = re.search(r'\$([\d,]+)', text)
+        match = self.MONEY_PATTERN.search(text)
         if match:
             money_str = match.group(1).replace(',', '')
             try:
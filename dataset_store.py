@@ -0,0 +1,172 @@
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+
+import pandas as pd
+
+import columnar
+import metrics
+
+# Folder with the cleaned datasets produced by data_preparation.ipynb
+DATA_DIR = os.environ.get('DATA_DIR', os.path.join('data_wrangling', 'data'))
+
+# Datasets served by the API: short name -> file name inside DATA_DIR
+DATASETS = {
+    'all_known': 'films_all_known.json',
+    'metascore_unknown': 'films_metascore_unknown.json',
+}
+
+NUMERIC_COLUMNS = ['year', 'imdb', 'metascore', 'production_budget', 'box_office',
+                   'num_of_awards', 'num_of_nominations']
+LIST_COLUMNS = ['genres', 'actors', 'directors', 'countries']
+
+
+def normalize_films(films):
+    """Build a DataFrame with consistent dtypes from a list of film dicts"""
+    df = pd.DataFrame(films)
+    for column in NUMERIC_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors='coerce')
+    for column in LIST_COLUMNS:
+        if column in df.columns:
+            # Missing lists become empty lists so explode/groupby drop them the same way
+            df[column] = [value if isinstance(value, list) else [] for value in df[column]]
+    return df
+
+
+def records_from_frame(df):
+    """Turn a normalized frame back into film dicts (NaN becomes None as in the JSON)"""
+    films = df.to_dict('records')
+    for film in films:
+        for key, value in film.items():
+            if isinstance(value, float) and math.isnan(value):
+                film[key] = None
+    return tuple(films)
+
+
+class DatasetStore:
+    """Loads every dataset once and hands out shared read-only views"""
+
+    def __init__(self, data_dir=DATA_DIR, datasets=None):
+        self.data_dir = data_dir
+        self.datasets = dict(datasets or DATASETS)
+        self.version = None
+        self.last_modified = 0
+        self.sources = {}
+        self._frames = {}
+        self._records = {}
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self.version is not None
+
+    def path(self, name):
+        return os.path.join(self.data_dir, self.datasets[name])
+
+    def load(self):
+        """Parse all datasets and compute the dataset version (only the first call does work)"""
+        if self.loaded:
+            return self
+        with self._lock:
+            if not self.loaded:
+                self._load()
+        return self
+
+    def reload(self):
+        """Drop everything and parse the files again, e.g. after the data was refreshed"""
+        with self._lock:
+            self._load()
+        return self
+
+    def _load(self):
+        frames = {}
+        records = {}
+        sources = {}
+        fingerprint = hashlib.sha256()
+        last_modified = 0
+        started = time.perf_counter()
+        loaded = {}
+        for name in sorted(self.datasets):
+            file_path = self.path(name)
+            try:
+                frame, films, digest, mtime, source = self._load_dataset(file_path)
+            except Exception as e:
+                print(f"Error loading {file_path}: {e}")
+                frames[name] = None
+                records[name] = None
+                fingerprint.update(f"{name}:missing".encode())
+                continue
+            # The digest is the one of the JSON source, so both formats give the same version
+            fingerprint.update(f"{name}:{digest}".encode())
+            last_modified = max(last_modified, mtime)
+            frames[name] = frame
+            sources[name] = source
+            loaded_path = columnar.columnar_path(file_path) if source == 'columnar' else file_path
+            loaded[name] = (len(frame), os.path.getsize(loaded_path))
+            if films is not None:
+                records[name] = tuple(films)
+        self._frames = frames
+        self._records = records
+        self.sources = sources
+        # Newest modification time of the dataset files (Unix time), used for Last-Modified
+        self.last_modified = int(last_modified)
+        self.version = fingerprint.hexdigest()[:16]
+        metrics.dataset_loaded(time.perf_counter() - started, loaded)
+
+    def _load_dataset(self, file_path):
+        """Return (frame, films or None, source sha256, mtime, format) for one dataset"""
+        fcol_path = columnar.columnar_path(file_path)
+        if os.path.exists(fcol_path):
+            fcol_mtime = os.path.getmtime(fcol_path)
+            if not os.path.exists(file_path) or fcol_mtime >= os.path.getmtime(file_path):
+                # Memory-mapped: numeric columns are shared with every other worker
+                frame, header = columnar.read_columnar(fcol_path)
+                return frame, None, header['source'].get('sha256', ''), fcol_mtime, 'columnar'
+            print(f"{fcol_path} is older than {file_path}, loading the JSON instead")
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+            mtime = os.fstat(f.fileno()).st_mtime
+        films = json.loads(raw)
+        return normalize_films(films), films, hashlib.sha256(raw).hexdigest(), mtime, 'json'
+
+    def frame(self, name):
+        """Return the dataset as a DataFrame, or None when it could not be loaded.
+
+        The result is a shallow copy: columns added by the caller never leak
+        into the shared frame, but existing columns must not be modified in place.
+        """
+        with metrics.phase('data_load'):
+            self.load()
+            df = self._frames.get(name)
+            return None if df is None else df.copy(deep=False)
+
+    def records(self, name):
+        """Return the dataset as a tuple of raw film dicts (treat them as read-only)"""
+        with metrics.phase('data_load'):
+            self.load()
+            if name not in self._records and self._frames.get(name) is not None:
+                # Columnar datasets only build the dicts when something asks for them
+                with self._lock:
+                    if name not in self._records:
+                        self._records[name] = records_from_frame(self._frames[name])
+            return self._records.get(name)
+
+    def info(self):
+        """Row counts per dataset together with the dataset version"""
+        self.load()
+        return {
+            'version': self.version,
+            'sources': dict(self.sources),
+            'datasets': {
+                name: (None if df is None else int(len(df)))
+                for name, df in self._frames.items()
+            },
+        }
+
+
+# Shared store used by the Flask app
+store = DatasetStore()
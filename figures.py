@@ -0,0 +1,345 @@
+import json
+import threading
+from collections import Counter, OrderedDict, defaultdict
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+import metrics
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the standard json module is the fallback
+    orjson = None
+
+
+def _to_native(value):
+    # numpy scalars and arrays coming out of pandas/plotly
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """Serialize a (figure) dict to compact JSON bytes, numpy arrays included.
+
+    orjson serializes numpy arrays natively and is several times faster on
+    figure dicts; without it numpy values are converted with tolist().
+    NaN is written as null on the orjson path.
+    """
+    with metrics.phase('serialize'):
+        if orjson is not None:
+            return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        return json.dumps(obj, separators=(',', ':'), default=_to_native).encode('utf-8')
+
+
+def radar_chart(store):
+    films = store.records('all_known')
+    if films is None:
+        return None
+
+    # Genre grouping
+    genre_revenue = defaultdict(list)
+    genre_budget = defaultdict(list)
+
+    for film in films:
+        if not film.get("genres"):
+            continue
+
+        for genre in film["genres"]:
+            if film.get("box_office"):
+                genre_revenue[genre].append(film["box_office"])
+            if film.get("production_budget"):
+                genre_budget[genre].append(film["production_budget"])
+
+    # Calculating of mean values
+    avg_revenue = {genre: np.mean(values) for genre, values in genre_revenue.items()}
+    avg_budget = {genre: np.mean(values) for genre, values in genre_budget.items()}
+
+    # Concatenation to DataFrame
+    genres = sorted(set(avg_budget.keys()))
+    combined_data = [
+        {
+            "Genre": genre,
+            "Avg Box Office": avg_revenue.get(genre, 0),
+            "Avg Budget": avg_budget.get(genre, 0)
+        }
+        for genre in genres
+    ]
+
+    df_combined = pd.DataFrame(combined_data)
+    df_combined = df_combined.sort_values("Avg Budget", ascending=False)
+
+    # Continue with radar plot
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatterpolar(
+        r=df_combined["Avg Box Office"].tolist(),
+        theta=df_combined["Genre"].tolist(),
+        fill='toself',
+        name='Avg Box Office',
+        line=dict(color='#08D9D6', width=8),  # Thicker line
+        marker=dict(color='#08D9D6', size=16)  # Bigger points
+    ))
+
+    fig.add_trace(go.Scatterpolar(
+        r=df_combined["Avg Budget"].tolist(),
+        theta=df_combined["Genre"].tolist(),
+        fill='toself',
+        name='Avg Budget',
+        line=dict(color='#FF2E63', width=8),  # Thicker line
+        marker=dict(color='#FF2E63', size=16)  # Bigger points
+    ))
+
+    fig.update_layout(
+        template="plotly_dark",
+        paper_bgcolor="#000000",
+        plot_bgcolor="#000000",
+        font=dict(size=18, color="#EAEAEA"),  # Bigger font
+        legend=dict(font=dict(size=20)),  # Bigger legend
+        polar=dict(
+            bgcolor="black",
+            radialaxis=dict(visible=True, color="white", tickfont=dict(size=16)),  # Bigger ticks
+            angularaxis=dict(color="white", tickfont=dict(size=16))  # Bigger ticks
+        ),
+        showlegend=True,
+        title=" "
+    )
+
+    return json.loads(fig.to_json())
+
+
+def stacked_avg_ratings(store):
+    films = store.records('metascore_unknown')
+    if films is None:
+        return None
+
+    genre_counter = Counter()
+    for film in films:
+        if "genres" in film:
+            genre_counter.update(film["genres"])
+
+    top_20_genres = [genre for genre, _ in genre_counter.most_common(20)]  # Keep the order
+
+    genre_ratings = {genre: {"imdb": [], "metascore": []} for genre in top_20_genres}
+
+    for film in films:
+        if "genres" in film and film["imdb"] and film["metascore"]:
+            for genre in film["genres"]:
+                if genre in genre_ratings:
+                    genre_ratings[genre]["imdb"].append(film["imdb"])
+                    genre_ratings[genre]["metascore"].append(film["metascore"])
+
+    genre_list = []
+    imdb_list = []
+    metascore_list = []
+
+    for genre in top_20_genres:
+        imdb_scores = genre_ratings[genre]["imdb"]
+        metascore_scores = genre_ratings[genre]["metascore"]
+        if imdb_scores and metascore_scores:
+            genre_list.append(genre)
+            # Calculate original average values - no rescaling needed
+            avg_imdb = sum(imdb_scores) / len(imdb_scores)
+            avg_metascore = sum(metascore_scores) / len(metascore_scores) / 10  # Convert to 0-10 scale
+
+            imdb_list.append(round(avg_imdb, 2))
+            metascore_list.append(round(avg_metascore, 2))
+
+    # Create the figure with the data traces
+    fig = go.Figure(data=[
+        go.Bar(name="IMDb", x=genre_list, y=imdb_list, marker_color="#ff0073"),
+        go.Bar(name="Metascore(scaled)", x=genre_list, y=metascore_list, marker_color="#7401ff")
+    ])
+
+    fig.update_layout(
+        barmode="group",
+        title=" ",
+        xaxis_title="Genre",
+        yaxis_title="Average rating",
+        template="plotly_dark",
+        font=dict(size=18),
+        yaxis=dict(
+            range=[1, 10],
+            dtick=1,
+            tickfont=dict(size=16),
+            title=dict(text="Average rating", font=dict(size=20))
+        ),
+        xaxis=dict(
+            tickangle=45,
+            tickfont=dict(size=16),
+            title=dict(text="Genre", font=dict(size=20))
+        ),
+        legend=dict(
+            font=dict(size=18)
+        ),
+        margin=dict(l=60, r=60, t=60, b=120)
+    )
+
+    figure = fig.to_dict()
+    return {
+        "data": figure["data"],
+        "layout": figure["layout"]
+    }
+
+
+def animated_ratings(store, top_genres=10):
+    films = store.records('metascore_unknown')
+    if films is None:
+        return None
+
+    genre_counter = Counter()
+    for film in films:
+        if "genres" in film:
+            genre_counter.update(film["genres"])
+
+    top_10_genres = {genre for genre, _ in genre_counter.most_common(top_genres)}
+
+    data = []
+    for film in films:
+        if "genres" in film and film["imdb"] and film["metascore"]:
+            imdb_rounded = round(film["imdb"] * 2) / 2
+            metascore_rounded = round(film["metascore"] / 5) * 5
+            for genre in film["genres"]:
+                if genre in top_10_genres:
+                    data.append({"genre": genre, "rating_type": "IMDb", "score": imdb_rounded})
+                    data.append({"genre": genre, "rating_type": "Metascore", "score": metascore_rounded / 10})
+
+    df = pd.DataFrame(data)
+
+    fig = px.histogram(
+        df,
+        x="score",
+        color="rating_type",
+        barmode="group",
+        animation_frame="genre",
+        title=" ",
+        labels={"score": "Rating ", "count": "Number of films"},
+        color_discrete_map={"IMDb": "#ff0073", "Metascore": "#7401ff"},
+        template='none'
+    )
+
+    fig.update_layout(
+        xaxis_title="Rating",
+        yaxis_title="Number of films",
+        title_font_size=24,  # Increased from 20
+        font=dict(size=18, color="#EAEAEA"),  # Increased from 14
+        bargap=0.1,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        xaxis_showgrid=False,
+        yaxis_showgrid=False,
+        xaxis_showline=False,
+        yaxis_showline=False,
+        transition={'duration': 500, 'easing': 'cubic-in-out'}
+    )
+    return fig.to_html(full_html=False, config={'displayModeBar': False})
+
+
+# Builders that can run in the compute pool: name -> function(store, **params)
+FIGURE_BUILDS = {
+    'animated_ratings': animated_ratings,
+    'radar_chart': radar_chart,
+    'stacked_avg_ratings': stacked_avg_ratings,
+}
+
+
+def build_in_worker(name, version, params):
+    """Compute pool entry point: build a figure from the store inherited from the parent"""
+    from dataset_store import store
+
+    # The pool may have been forked before the datasets were refreshed
+    if store.load().version != version:
+        store.reload()
+    return FIGURE_BUILDS[name](store, **params)
+
+
+class FigureCache:
+    """Final serialized figure bytes keyed by dataset version, figure name and parameters.
+
+    With a scheduler, concurrent misses for the same figure share one build,
+    and after a dataset change the figure of the previous version is served
+    while a single background build refreshes it.
+    """
+
+    def __init__(self, store, max_entries=64, scheduler=None):
+        self.store = store
+        self.max_entries = max_entries
+        self.scheduler = scheduler
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self._entries = OrderedDict()
+        self._latest = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def key(self, name, params=None):
+        return (self.store.load().version, name, tuple(sorted((params or {}).items())))
+
+    def get(self, name, build, params=None):
+        """Return cached bytes for the figure, calling build() -> bytes only on a miss"""
+        return self.lookup(name, build, params)[0]
+
+    def lookup(self, name, build, params=None):
+        """Return (bytes, fresh); fresh is False when a previous version's figure is served"""
+        key = self.key(name, params)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                metrics.cache_event('figure', 'hit')
+                return self._entries[key], True
+            latest_version, stale = self._latest.get(key[1:], (None, None))
+            if latest_version == key[0]:
+                # Fell out of the LRU but still current: back in, it competes for a slot again
+                self._insert(key, stale)
+                self.hits += 1
+                metrics.cache_event('figure', 'hit')
+                return stale, True
+            self.misses += 1
+            if self.scheduler is None:
+                stale = None
+            if stale is not None:
+                self.stale_hits += 1
+                refresh = key not in self._refreshing
+                self._refreshing.add(key)
+        metrics.cache_event('figure', 'miss' if stale is None else 'stale')
+        if stale is not None:
+            if refresh:
+                threading.Thread(target=self._refresh, args=(key, build), daemon=True).start()
+            return stale, False
+        return self._build(key, build), True
+
+    def _build(self, key, build):
+        body = build() if self.scheduler is None else self.scheduler.run(('figure',) + key, build)
+        if body is None:
+            return None
+        with self._lock:
+            self._insert(key, body)
+        return body
+
+    def _insert(self, key, body):
+        # Called with the lock held
+        self._entries[key] = body
+        self._entries.move_to_end(key)
+        self._latest[key[1:]] = (key[0], body)
+        # Entries of older dataset versions fall out first
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _refresh(self, key, build):
+        try:
+            self._build(key, build)
+        except Exception as e:
+            print(f"Error refreshing figure {key[1]}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._latest.clear()
@@ -0,0 +1,67 @@
+# Gunicorn settings for production, used by the Dockerfile:
+#
+#     gunicorn --config gunicorn.conf.py app:app
+#
+# Every value can be overridden through the environment variables below.
+import gc
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8080)}"
+
+# Import the app (and load the datasets) once in the master process, forked
+# workers then share the loaded data copy-on-write instead of parsing it again
+preload_app = True
+
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+# sync, gthread, ... ; threads > 1 switches the sync worker to gthread
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 0))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+# /metrics combines the samples every worker writes to this directory. It is
+# set here, before the app (and prometheus_client) is imported, and emptied
+# so counters of a previous run don't leak into this one
+metrics_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR',
+                                    os.path.join(tempfile.gettempdir(), 'films-prometheus'))
+shutil.rmtree(metrics_dir, ignore_errors=True)
+os.makedirs(metrics_dir)
+
+
+def when_ready(server):
+    # Runs in the master before any worker is forked: fill every cache so the
+    # first visitors after a deploy don't pay for building them
+    from app import warm_up
+    from scheduler import scheduler
+
+    server.log.info("Warming up the data routes")
+    warm_up()
+    # Workers start their own compute pool, forked from them rather than from the master
+    scheduler.shutdown()
+    # Keep the warmed objects out of the garbage collector so workers don't
+    # touch (and copy) their pages when collecting
+    gc.freeze()
+    server.log.info("Warm-up finished")
+
+
+def post_fork(server, worker):
+    # Fork the compute pool while the worker has a single thread: forked later from a
+    # request thread, the children could inherit locks held by the other threads
+    from scheduler import scheduler
+
+    scheduler.start()
+
+
+def child_exit(server, worker):
+    # Drop the live gauges of a worker that exited
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
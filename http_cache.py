@@ -0,0 +1,104 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+
+from flask import g, request
+
+import aggregates
+import metrics
+
+# Routes whose responses only depend on the dataset version and the request parameters
+CACHED_PREFIXES = ('/api/',)
+CACHED_PATHS = ('/animated_ratings',)
+
+# Defaults for the Cache-Control header, overridable through app.config or the environment
+DEFAULT_MAX_AGE = int(os.environ.get('API_CACHE_MAX_AGE', 300))
+DEFAULT_STALE_WHILE_REVALIDATE = int(os.environ.get('API_CACHE_STALE_WHILE_REVALIDATE', 86400))
+
+# Bump when a route returns a different body for the same data (new fields, payload layout)
+PAYLOAD_VERSION = 1
+# Build of the app (e.g. the git commit, set by the Docker build): a deploy can change any response
+APP_VERSION = os.environ.get('APP_VERSION', '')
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def payload_version():
+    """Version of the response formats, part of every ETag"""
+    return f"{aggregates.SNAPSHOT_FORMAT}.{PAYLOAD_VERSION}.{APP_VERSION}"
+
+
+def code_modified():
+    """Newest modification time of the app modules, the earliest a response of this build can date from"""
+    return int(max(os.path.getmtime(os.path.join(APP_DIR, name))
+                   for name in os.listdir(APP_DIR) if name.endswith('.py')))
+
+
+def is_cached_route(path):
+    return path.startswith(CACHED_PREFIXES) or path in CACHED_PATHS
+
+
+def compute_etag(version, path, args, accept=''):
+    """Strong ETag for a response derived from the dataset version, payload format and request parameters"""
+    key = hashlib.sha256()
+    key.update(version.encode())
+    key.update(f"\0format={payload_version()}".encode())
+    key.update(path.encode())
+    for name, value in sorted(args):
+        key.update(f"\0{name}={value}".encode())
+    # Some endpoints negotiate the format, so the Accept header is part of the key
+    key.update(f"\0accept={accept}".encode())
+    return key.hexdigest()[:32]
+
+
+def cache_control(app):
+    max_age = app.config.get('API_CACHE_MAX_AGE', DEFAULT_MAX_AGE)
+    stale = app.config.get('API_CACHE_STALE_WHILE_REVALIDATE', DEFAULT_STALE_WHILE_REVALIDATE)
+    value = f"public, max-age={max_age}"
+    if stale:
+        value += f", stale-while-revalidate={stale}"
+    return value
+
+
+def init_app(app, store):
+    """Add ETag/Last-Modified/Cache-Control to the data routes and answer conditional GETs with 304"""
+    # Responses change when the datasets or the code do
+    released = code_modified()
+
+    def last_modified():
+        return max(store.last_modified, released) if store.last_modified else 0
+
+    def add_validators(response, etag):
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = cache_control(app)
+        if last_modified():
+            response.last_modified = datetime.fromtimestamp(last_modified(), tz=timezone.utc)
+        response.vary.add('Accept')
+        return response
+
+    @app.before_request
+    def answer_conditional_get():
+        if request.method not in ('GET', 'HEAD') or not is_cached_route(request.path):
+            return None
+        store.load()
+        etag = compute_etag(store.version, request.path, request.args.items(multi=True),
+                            request.headers.get('Accept', ''))
+        g.http_cache_etag = etag
+
+        # If-None-Match wins over If-Modified-Since (RFC 9110, 13.2.2)
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains(etag) or request.if_none_match.star_tag
+        else:
+            since = request.if_modified_since
+            not_modified = bool(since and last_modified() and last_modified() <= since.timestamp())
+        metrics.cache_event('http', 'hit' if not_modified else 'miss')
+        if not_modified:
+            # The handler is never run for an unchanged resource
+            return add_validators(app.response_class(status=304), etag)
+        return None
+
+    @app.after_request
+    def set_validators(response):
+        etag = g.pop('http_cache_etag', None)
+        if etag is None or response.status_code != 200:
+            return response
+        return add_validators(response, etag)
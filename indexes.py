@@ -0,0 +1,307 @@
+import re
+import threading
+
+import numpy as np
+
+import metrics
+from dataset_store import store as default_store
+
+# Defaults of the unfiltered charts
+DEFAULT_TOP_GENRES = 5
+DEFAULT_DECADE_BUCKET = 10
+DEFAULT_TREND_BUCKET = 5
+DEFAULT_TOP_ACTORS = 5
+# Most year buckets a filtered request may ask for (year range / bucket)
+MAX_YEAR_BUCKETS = 1000
+
+# Per-actor totals that /api/actors/top can rank by
+ACTOR_METRICS = ('box_office', 'films', 'awards', 'nominations', 'imdb')
+ACTOR_ID_PATTERN = re.compile(r'/name/(nm\d+)')
+
+
+def _inverted_index(lists):
+    """value -> sorted array of the row ids whose list contains the value"""
+    rows = {}
+    for row, values in enumerate(lists):
+        for value in set(values):
+            rows.setdefault(value, []).append(row)
+    return {value: np.array(ids, dtype=np.int64) for value, ids in rows.items()}
+
+
+def _bucket_label(start, bucket):
+    return f"{start}s" if bucket == 10 else f"{start}-{start + bucket - 1}"
+
+
+class FilmIndex:
+    """Inverted indexes over one dataset frame: genre/country -> row ids and a sorted year column"""
+
+    def __init__(self, frame):
+        self.rows = len(frame)
+        self.year = frame['year'].to_numpy(dtype=float)
+        self.imdb = frame['imdb'].to_numpy(dtype=float)
+        known_years = self.year[~np.isnan(self.year)]
+        self.min_year = int(known_years.min()) if len(known_years) else None
+        self.max_year = int(known_years.max()) if len(known_years) else None
+        self.box_office = frame['box_office'].to_numpy(dtype=float)
+        # Row ids ordered by year, so a year range is two binary searches
+        self.year_order = np.argsort(self.year, kind='stable')
+        self.sorted_years = self.year[self.year_order]
+        self.genre_rows = _inverted_index(frame['genres'])
+        self.country_rows = _inverted_index(frame['countries'])
+
+    def _rows_with_any(self, index, values):
+        parts = [index[value] for value in values if value in index]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(parts))
+
+    def select(self, year_from=None, year_to=None, genres=None, countries=None):
+        """Sorted row ids matching every given filter, None when nothing is filtered.
+
+        genres and countries match films having any of the listed values.
+        """
+        rows = None
+        if year_from is not None or year_to is not None:
+            start = 0 if year_from is None else np.searchsorted(self.sorted_years, year_from, side='left')
+            # NaN years sort last and never match a range
+            end = (np.searchsorted(self.sorted_years, np.inf, side='left') if year_to is None
+                   else np.searchsorted(self.sorted_years, year_to, side='right'))
+            rows = np.sort(self.year_order[start:end])
+        for index, values in ((self.genre_rows, genres), (self.country_rows, countries)):
+            if values:
+                matching = self._rows_with_any(index, values)
+                rows = matching if rows is None else np.intersect1d(rows, matching, assume_unique=True)
+        return rows
+
+    def _mask(self, rows):
+        mask = np.zeros(self.rows, dtype=bool)
+        mask[rows] = True
+        return mask
+
+    def genre_box_office(self, rows=None, genres=None, top=DEFAULT_TOP_GENRES):
+        """Average box office (millions) of the top genres among the selected rows"""
+        mask = None if rows is None else self._mask(rows)
+        results = []
+        for genre in sorted(genres or self.genre_rows):
+            genre_rows = self.genre_rows.get(genre)
+            if genre_rows is None:
+                continue
+            if mask is not None:
+                genre_rows = genre_rows[mask[genre_rows]]
+            values = self.box_office[genre_rows]
+            values = values[~np.isnan(values)]
+            if len(values):
+                results.append((genre, values.mean() / 1_000_000))
+        results.sort(key=lambda item: item[1], reverse=True)
+        results = results[:top]
+        return {
+            'labels': [genre for genre, _ in results],
+            'data': np.round([value for _, value in results], 2).tolist()
+        }
+
+    def _year_buckets(self, rows, bucket, year_from, year_to, values):
+        # Rows with a known year and value, as (bucket starts, bucket number of each row, values);
+        # the requested range is clamped to the years of the dataset
+        rows = np.arange(self.rows) if rows is None else rows
+        years = self.year[rows]
+        values = values[rows]
+        known = ~np.isnan(years) & ~np.isnan(values)
+        years = years[known]
+        values = values[known]
+        if not len(years):
+            return [], years.astype(int), values
+        first = int(years.min()) if year_from is None else max(year_from, self.min_year)
+        last = int(years.max()) if year_to is None else min(year_to, self.max_year)
+        starts = list(range(first // bucket * bucket, last + 1, bucket))[:MAX_YEAR_BUCKETS]
+        if not starts:
+            return [], years.astype(int), values
+        return starts, ((years - starts[0]) // bucket).astype(int), values
+
+    def decade_avg_imdb(self, rows=None, bucket=DEFAULT_DECADE_BUCKET, year_from=None, year_to=None):
+        """Average IMDb rating per bucket of years, null for empty buckets"""
+        starts, buckets, imdb = self._year_buckets(rows, bucket, year_from, year_to, self.imdb)
+        # Every bucket's mean in one pass
+        inside = (buckets >= 0) & (buckets < len(starts))
+        counts = np.bincount(buckets[inside], minlength=len(starts))
+        sums = np.bincount(buckets[inside], weights=imdb[inside], minlength=len(starts))
+        data = [round(float(total / count), 2) if count else None
+                for total, count in zip(sums.tolist(), counts.tolist())]
+        return {
+            'labels': [_bucket_label(start, bucket) for start in starts],
+            'data': data
+        }
+
+    def imdb_trends(self, rows=None, bucket=DEFAULT_TREND_BUCKET):
+        """Share of high (> 7), mid (6-7) and low (< 6) rated films per period"""
+        rows = np.arange(self.rows) if rows is None else rows
+        years = self.year[rows]
+        imdb = self.imdb[rows]
+        # Same rule as the unfiltered chart: a rating and a year must be present and non-zero
+        known = ~np.isnan(years) & ~np.isnan(imdb) & (years != 0) & (imdb != 0)
+        periods = (years[known] // bucket * bucket).astype(int)
+        imdb = imdb[known]
+        result = []
+        for period in np.unique(periods).tolist():
+            group = imdb[periods == period]
+            total = len(group)
+            result.append({
+                "period": period,
+                "high_pct": round(int((group > 7.0).sum()) / total * 100, 2),
+                "mid_pct": round(int(((group >= 6) & (group <= 7.0)).sum()) / total * 100, 2),
+                "low_pct": round(int((group < 6).sum()) / total * 100, 2),
+                "avg_rating": round(float(group.mean()), 2)
+            })
+        return result
+
+
+def extract_full_name(actor):
+    if not isinstance(actor, dict):
+        return None
+    if 'name' in actor and 'surname' in actor:
+        if f"{actor['name']} {actor['surname']}" == "Robert Jr.":
+            return "Robert Downey Jr."
+        return f"{actor['name']} {actor['surname']}"
+    return None
+
+
+def actor_id(actor):
+    """IMDb name ID (nm...) of a cast entry, taken from its url when the id is missing"""
+    if not isinstance(actor, dict):
+        return None
+    if actor.get('id'):
+        return actor['id']
+    match = ACTOR_ID_PATTERN.search(actor.get('url') or '')
+    return match.group(1) if match else None
+
+
+class ActorIndex:
+    """Actor -> film row ids and per-actor totals, keyed by IMDb name ID"""
+
+    def __init__(self, frame):
+        self.positions = {}
+        self.ids = []
+        self.names = []
+        self.urls = []
+        film_rows = []
+        actor_positions = []
+        for row, actors in enumerate(frame['actors']):
+            seen = set()
+            for actor in actors:
+                key = actor_id(actor)
+                if key is None or key in seen:
+                    continue
+                seen.add(key)
+                position = self.positions.get(key)
+                if position is None:
+                    position = self.positions[key] = len(self.ids)
+                    self.ids.append(key)
+                    self.names.append(extract_full_name(actor))
+                    self.urls.append(actor.get('url'))
+                film_rows.append(row)
+                actor_positions.append(position)
+        actors = len(self.ids)
+        film_rows = np.array(film_rows, dtype=np.int64)
+        actor_positions = np.array(actor_positions, dtype=np.int64)
+
+        # Film rows grouped by actor: rows of actor i are film_rows[offsets[i]:offsets[i + 1]]
+        self.film_rows = film_rows[np.argsort(actor_positions, kind='stable')]
+        counts = np.bincount(actor_positions, minlength=actors)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        def column(name):
+            if name not in frame.columns:
+                return np.full(len(film_rows), np.nan)
+            return frame[name].to_numpy(dtype=float)[film_rows]
+
+        def total(name):
+            return np.bincount(actor_positions, weights=np.nan_to_num(column(name)), minlength=actors)
+
+        imdb = column('imdb')
+        rated = ~np.isnan(imdb)
+        rated_films = np.bincount(actor_positions[rated], minlength=actors)
+        imdb_total = np.bincount(actor_positions[rated], weights=imdb[rated], minlength=actors)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            imdb_mean = np.where(rated_films > 0, imdb_total / rated_films, np.nan)
+        self.totals = {
+            'box_office': total('box_office'),
+            'films': counts.astype(float),
+            'awards': total('num_of_awards'),
+            'nominations': total('num_of_nominations'),
+            'imdb': imdb_mean,
+        }
+        # Actor positions ordered by each metric (highest first, unknown last), a top list is a slice
+        self.rankings = {
+            metric: np.argsort(-values, kind='stable') for metric, values in self.totals.items()
+        }
+        self.titles = frame['title'].tolist() if 'title' in frame.columns else [None] * len(frame)
+        self.years = frame['year'].to_numpy(dtype=float) if 'year' in frame.columns else np.full(len(frame), np.nan)
+        self.links = frame['link'].tolist() if 'link' in frame.columns else [None] * len(frame)
+
+    def _value(self, metric, position):
+        value = self.totals[metric][position]
+        if np.isnan(value):
+            return None
+        return round(float(value), 2) if metric == 'imdb' else int(value)
+
+    def actor(self, actor_id):
+        """Totals and films of one actor, None for an unknown ID"""
+        position = self.positions.get(actor_id)
+        if position is None:
+            return None
+        rows = self.film_rows[self.offsets[position]:self.offsets[position + 1]].tolist()
+        return {
+            'id': actor_id,
+            'name': self.names[position],
+            'url': self.urls[position],
+            **{metric: self._value(metric, position) for metric in ACTOR_METRICS},
+            'titles': [{
+                'title': self.titles[row],
+                'year': None if np.isnan(self.years[row]) else int(self.years[row]),
+                'link': self.links[row],
+            } for row in rows]
+        }
+
+    def top(self, metric, limit=DEFAULT_TOP_ACTORS):
+        """The `limit` actors with the highest total of a metric"""
+        positions = self.rankings[metric][:limit].tolist()
+        return {
+            'metric': metric,
+            'ids': [self.ids[position] for position in positions],
+            'labels': [self.names[position] for position in positions],
+            'data': [self._value(metric, position) for position in positions]
+        }
+
+
+class DatasetIndex:
+    """Builds an index (FilmIndex, ActorIndex) of a dataset once per dataset version"""
+
+    def __init__(self, build, store=default_store, dataset='all_known'):
+        self.build = build
+        self.store = store
+        self.dataset = dataset
+        self.version = None
+        self._index = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Current index, or None when the dataset could not be loaded"""
+        version = self.store.load().version
+        if self.version == version:
+            metrics.cache_event('index', 'hit')
+            return self._index
+        with self._lock:
+            # A concurrent caller may have built it while this one waited
+            if self.version == version:
+                metrics.cache_event('index', 'hit')
+                return self._index
+            metrics.cache_event('index', 'miss')
+            with metrics.phase('compute'):
+                frame = self.store.frame(self.dataset)
+                self._index = None if frame is None else self.build(frame)
+                self.version = version
+            return self._index
+
+
+# Shared indexes used by the Flask app
+film_indexes = DatasetIndex(FilmIndex)
+actor_indexes = DatasetIndex(ActorIndex)
@@ -0,0 +1,136 @@
+"""Request latency, per-phase timings and cache counters, exposed at /metrics.
+
+Every route is timed by the Flask hooks added in init_app. Code doing the
+work marks its phases with `with metrics.phase('compute'):`; the time of a
+request is split between data_load, compute, plotly, serialize and other
+(whatever is left), nested phases are not counted twice.
+
+With several gunicorn workers set PROMETHEUS_MULTIPROC_DIR to an empty
+directory so the samples of all workers are combined (see gunicorn.conf.py).
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge,
+                               Histogram, generate_latest, multiprocess)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency by route',
+    ['route', 'method', 'status'])
+PHASE_LATENCY = Histogram(
+    'http_request_phase_duration_seconds', 'Time spent in each phase of a request',
+    ['route', 'phase'])
+RESPONSE_BYTES = Histogram(
+    'http_response_bytes', 'Response body size by route', ['route'],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216))
+CACHE_EVENTS = Counter(
+    'cache_events_total', 'Cache lookups by cache and result (hit, miss, stale)',
+    ['cache', 'result'])
+COMPUTE_EVENTS = Counter(
+    'compute_events_total', 'Scheduled computations (run, offloaded, coalesced, timeout)',
+    ['event'])
+DATASET_LOAD_SECONDS = Gauge(
+    'dataset_load_seconds', 'Duration of the last dataset load', multiprocess_mode='max')
+DATASET_ROWS = Gauge(
+    'dataset_rows', 'Films per dataset', ['dataset'], multiprocess_mode='max')
+DATASET_BYTES = Gauge(
+    'dataset_bytes', 'Size of the dataset file', ['dataset'], multiprocess_mode='max')
+
+
+def cache_event(cache, result):
+    CACHE_EVENTS.labels(cache, result).inc()
+
+
+def compute_event(event):
+    COMPUTE_EVENTS.labels(event).inc()
+
+
+def dataset_loaded(seconds, datasets):
+    """Record a dataset load: datasets maps name -> (rows, file size in bytes)"""
+    DATASET_LOAD_SECONDS.set(seconds)
+    for name, (rows, size) in datasets.items():
+        DATASET_ROWS.labels(name).set(rows)
+        DATASET_BYTES.labels(name).set(size)
+
+
+def _tracking():
+    return has_request_context() and 'metrics_phases' in g
+
+
+@contextmanager
+def phase(name):
+    """Count the time spent in the block towards a phase of the current request"""
+    if not _tracking():
+        yield
+        return
+    stack = g.metrics_stack
+    now = time.perf_counter()
+    if stack:
+        # The enclosing phase is paused while this one runs
+        outer, started = stack[-1]
+        g.metrics_phases[outer] = g.metrics_phases.get(outer, 0.0) + now - started
+    stack.append([name, now])
+    try:
+        yield
+    finally:
+        now = time.perf_counter()
+        current, started = stack.pop()
+        g.metrics_phases[current] = g.metrics_phases.get(current, 0.0) + now - started
+        if stack:
+            stack[-1][1] = now
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, with jsonify() counted as the serialize phase"""
+
+    def dumps(self, obj, **kwargs):
+        with phase('serialize'):
+            return super().dumps(obj, **kwargs)
+
+
+def _route():
+    # The rule rather than the path keeps the number of series bounded
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        collected = CollectorRegistry()
+        multiprocess.MultiProcessCollector(collected)
+        return collected
+    return REGISTRY
+
+
+def init_app(app):
+    """Time every request. Call before the other init_app functions so their early responses are timed too"""
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_phases = {}
+        g.metrics_stack = []
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+        total = time.perf_counter() - start
+        route = _route()
+        REQUEST_LATENCY.labels(route, request.method, str(response.status_code)).observe(total)
+        phases = g.pop('metrics_phases', {})
+        for name, seconds in phases.items():
+            PHASE_LATENCY.labels(route, name).observe(seconds)
+        PHASE_LATENCY.labels(route, 'other').observe(max(total - sum(phases.values()), 0.0))
+        # Streamed responses have no length up front
+        if response.content_length is not None:
+            RESPONSE_BYTES.labels(route).observe(response.content_length)
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        return app.response_class(generate_latest(registry()), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,120 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import metrics
+
+# Size of the process pool for CPU-heavy builds (0 runs them in the calling thread)
+COMPUTE_WORKERS = int(os.environ.get('COMPUTE_WORKERS', 2))
+# Seconds a request waits for a computation before giving up
+COMPUTE_TIMEOUT = float(os.environ.get('COMPUTE_TIMEOUT', 30))
+
+# Marks "use the scheduler's timeout" (None waits as long as it takes)
+DEFAULT_TIMEOUT = object()
+
+# Raised by run() on a timeout: concurrent.futures.TimeoutError, which is not the builtin before Python 3.11
+ComputeTimeout = TimeoutError
+
+
+class ComputeScheduler:
+    """Runs each computation once for all concurrent callers asking for the same key.
+
+    Heavy builds can be offloaded to a bounded process pool so they don't hold
+    the GIL of the request threads. start() forks the pool while the process
+    has a single thread (gunicorn's post_fork), so children inherit the
+    datasets already loaded there. A pool created later, once request threads
+    run, uses forkserver/spawn children that load the datasets themselves:
+    forking while other threads hold locks can deadlock the children.
+    """
+
+    def __init__(self, max_workers=COMPUTE_WORKERS, timeout=COMPUTE_TIMEOUT):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.runs = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self._inflight = {}
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.RLock()
+
+    def _executor(self):
+        # A pool created before a fork (e.g. in the gunicorn master) can't be used by the child
+        if self._pool is None or self._pool_pid != os.getpid():
+            methods = multiprocessing.get_all_start_methods()
+            if 'fork' in methods and threading.active_count() == 1:
+                method = 'fork'
+            else:
+                method = 'forkserver' if 'forkserver' in methods else 'spawn'
+            context = multiprocessing.get_context(method)
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+            self._pool_pid = os.getpid()
+        return self._pool
+
+    def start(self):
+        """Create the process pool and its workers now, before the caller starts other threads"""
+        if self.max_workers <= 0:
+            return
+        with self._lock:
+            pool = self._executor()
+        # The workers are started by the first submitted task
+        pool.submit(os.getpid).result()
+
+    def _finished(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+                self._pool = None
+
+    def run(self, key, fn, *args, offload=False, timeout=DEFAULT_TIMEOUT):
+        """Return fn(*args), sharing one computation between callers using the same key.
+
+        With offload=True fn runs in the process pool (fn and args must be
+        picklable). Raises ComputeTimeout when the result is not ready within
+        timeout seconds (default COMPUTE_TIMEOUT, None waits indefinitely); an
+        offloaded computation keeps running and later callers wait for it
+        instead of starting another one.
+        """
+        run_here = False
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                self.runs += 1
+                if offload and self.max_workers > 0:
+                    metrics.compute_event('offloaded')
+                    future = self._executor().submit(fn, *args)
+                else:
+                    metrics.compute_event('run')
+                    future = Future()
+                    run_here = True
+                self._inflight[key] = future
+                future.add_done_callback(lambda done: self._finished(key, done))
+            else:
+                self.coalesced += 1
+                metrics.compute_event('coalesced')
+        if run_here:
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+        try:
+            return future.result(self.timeout if timeout is DEFAULT_TIMEOUT else timeout)
+        except TimeoutError:
+            self.timeouts += 1
+            metrics.compute_event('timeout')
+            raise
+
+    def shutdown(self):
+        """Stop the process pool, a new one is started by the next offloaded computation"""
+        with self._lock:
+            pool = self._pool if self._pool_pid == os.getpid() else None
+            self._pool = None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+# Shared scheduler used by the Flask app
+scheduler = ComputeScheduler()
@@ -443,6 +443,133 @@ function initPhysics() {
     updateCircles();
 }
 
+/**
+ * Rebuild a film link from the compact scatter payload
+ * @param {Object} header - columnar payload or binary header
+ * @param {number} index - point index across all datasets
+ * @param {number} linkId - numeric part of the IMDb title ID (0 - full link in header.links)
+ * @returns {string} - film URL
+ */
+function decodeScatterLink(header, index, linkId) {
+    if (header.links[index] !== undefined) {
+        return header.links[index];
+    }
+    return `${header.link_prefix}tt${String(linkId).padStart(header.link_digits, '0')}/`;
+}
+
+/**
+ * Decode the columnar scatter format (?format=columnar) into [{label, data: [{x, y, title, link}]}]
+ * @param {Object} payload - parsed JSON response
+ * @returns {Array} - datasets in the default object format
+ */
+function decodeScatterColumnar(payload) {
+    let index = 0;
+    return payload.datasets.map(dataset => ({
+        label: dataset.label,
+        data: dataset.x.map((x, i) => ({
+            x,
+            y: dataset.y[i],
+            title: payload.titles[dataset.title[i]],
+            link: decodeScatterLink(payload, index++, dataset.link[i])
+        }))
+    }));
+}
+
+/**
+ * Decode the binary scatter format (?format=binary) into [{label, data: [{x, y, title, link}]}]
+ * @param {ArrayBuffer} buffer - raw response body
+ * @returns {Array} - datasets in the default object format
+ */
+function decodeScatterBinary(buffer) {
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+    if (magic !== 'FLMC') {
+        throw new Error('Not a binary scatter payload');
+    }
+    const headerLength = view.getUint32(4, true);
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)));
+    const total = header.counts.reduce((sum, count) => sum + count, 0);
+
+    // Typed arrays are aligned by the server, so they can be viewed without copying
+    let offset = 8 + headerLength;
+    const xs = new Float64Array(buffer, offset, total);
+    offset += total * 8;
+    const ys = new Float64Array(buffer, offset, total);
+    offset += total * 8;
+    const titles = new Uint32Array(buffer, offset, total);
+    offset += total * 4;
+    const links = new Uint32Array(buffer, offset, total);
+
+    let index = 0;
+    return header.labels.map((label, datasetIndex) => {
+        const data = [];
+        for (let i = 0; i < header.counts[datasetIndex]; i++, index++) {
+            data.push({
+                x: xs[index],
+                y: ys[index],
+                title: header.titles[titles[index]],
+                link: decodeScatterLink(header, index, links[index])
+            });
+        }
+        return { label, data };
+    });
+}
+
+/**
+ * Fetch scatter datasets in the compact columnar format and decode them
+ * @param {string} apiEndpoint - /api/budget_box_office or /api/imdb_metascore
+ * @returns {Promise<Array>} - datasets in the default object format
+ */
+function fetchScatterData(apiEndpoint) {
+    return fetch(`${apiEndpoint}?format=columnar`)
+        .then(response => response.json())
+        .then(decodeScatterColumnar);
+}
+
+/**
+ * Request all chart payloads from /api/dashboard in one call
+ * The promise lives on window so every chart (and every include of this script) shares it
+ * @returns {Promise<Object>} - chart payloads keyed by section name
+ */
+function fetchDashboard() {
+    if (!window.dashboardRequest) {
+        const sections = [
+            'genres', 'decade_hits', 'actors', 'budget_box_office', 'imdb_metascore',
+            'stacked_avg_ratings', 'radar_chart', 'imdb_trends'
+        ];
+        window.dashboardRequest = fetch(`/api/dashboard?format=columnar&sections=${sections.join(',')}`)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`Dashboard request failed with status ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(payload => payload.sections);
+    }
+    return window.dashboardRequest;
+}
+
+/**
+ * Get the payload of one chart from the dashboard response, falling back to its own endpoint
+ * @param {string} apiEndpoint - endpoint of the chart, e.g. /api/genres
+ * @returns {Promise<Object>} - payload in the same format the endpoint returns by default
+ */
+function fetchChartData(apiEndpoint) {
+    const section = apiEndpoint.replace('/api/', '');
+    const isScatter = section === 'budget_box_office' || section === 'imdb_metascore';
+    return fetchDashboard()
+        .then(sections => {
+            if (!sections[section]) {
+                throw new Error(`No ${section} section in the dashboard response`);
+            }
+            return isScatter ? decodeScatterColumnar(sections[section]) : sections[section];
+        })
+        .catch(error => {
+            console.warn(`Falling back to ${apiEndpoint}:`, error);
+            return isScatter ? fetchScatterData(apiEndpoint) : fetch(apiEndpoint).then(response => response.json());
+        });
+}
+
 function initCharts() {
     // Define the click handler for scatter plot points
     const pointClickHandler = function(event, elements, chart) {
@@ -810,8 +937,7 @@ function initCharts() {
     // Function to fetch data and initialize a chart
     const initializeChart = (chartId, apiEndpoint, chartType = 'chartjs') => {
         if (chartType === 'd3') {
-            return fetch(apiEndpoint)
-                .then(response => response.json())
+            return fetchChartData(apiEndpoint)
                 .then(data => {
                     // Convert data to D3 format: [{ label, value }, ...]
                     let chartData = data.labels.map((label, index) => ({
@@ -831,8 +957,7 @@ function initCharts() {
         } else {
             // Wrap Chart.js logic in a Promise
             return new Promise((resolve, reject) => {
-                fetch(apiEndpoint)
-                    .then(response => response.json())
+                fetchChartData(apiEndpoint)
                     .then(data => {
                         const config = chartConfigs[chartId];
                         if (!config) {
@@ -982,8 +1107,7 @@ function initCharts() {
 }
 
 // Update Plotly fetches with new colors and transitions
-fetch("/api/stacked_avg_ratings")
-    .then(response => response.json())
+fetchChartData("/api/stacked_avg_ratings")
     .then(chartData => {
         // Preserve the important layout settings from backend while adding our styling
         const layout = {
@@ -1032,8 +1156,7 @@ fetch("/api/stacked_avg_ratings")
     })
     .catch(error => console.error('Error fetching/rendering stackedRatingChart:', error));
 
-fetch("/api/radar_chart")
-    .then(response => response.json())
+fetchChartData("/api/radar_chart")
     .then(chartData => {
         // Define Plotly layout with transitions and updated colors
         const layout = {
@@ -1123,8 +1246,7 @@ fetch("/api/radar_chart")
 
 async function renderImdbTrendChart() {
     try {
-        const response = await fetch('/api/imdb_trends');
-        const data = await response.json();
+        const data = await fetchChartData('/api/imdb_trends');
 
         const periods = data.map(d => d.period);
         const high = data.map(d => d.high_pct);
@@ -0,0 +1,179 @@
+"""Build and serve precompressed, content-hashed copies of the files in static/.
+
+Build step (run after changing anything in static/):
+
+    python static_assets.py [--source static] [--output static_build]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+
+from flask import request, send_file
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, only gzip variants are written without it
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIR = os.path.join(BASE_DIR, 'static')
+BUILD_DIR = os.path.join(BASE_DIR, 'static_build')
+MANIFEST_FILE = 'manifest.json'
+
+# Entry pages keep their name (they are the ones referencing the hashed files)
+ENTRY_PAGES = ('index.html',)
+# Files that are already compressed are not worth another pass
+COMPRESSIBLE_EXTENSIONS = ('.html', '.css', '.js', '.json', '.svg', '.ttf', '.otf', '.txt')
+# Precompressed variants in order of preference: Content-Encoding -> file suffix
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+HASH_LENGTH = 10
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+ENTRY_CACHE_CONTROL = 'no-cache'
+
+HTML_REFERENCE = re.compile(r'''((?:src|href)=["'])([^"'#?]+)(["'])''')
+CSS_REFERENCE = re.compile(r'''(url\(\s*["']?)([^"')#?]+)(["']?\s*\))''')
+
+
+def hashed_name(path, content):
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    root, ext = os.path.splitext(path)
+    return f"{root}.{digest}{ext}"
+
+
+def rewrite_references(content, pattern, base, manifest):
+    """Point relative references in an HTML/CSS file to the hashed file names"""
+    text = content.decode('utf-8')
+
+    def replace(match):
+        reference = match.group(2)
+        if '://' in reference or reference.startswith(('/', 'data:')):
+            return match.group(0)
+        target = os.path.normpath(os.path.join(base, reference)).replace(os.sep, '/')
+        if target not in manifest:
+            return match.group(0)
+        new_reference = os.path.relpath(manifest[target], base or '.').replace(os.sep, '/')
+        return f"{match.group(1)}{new_reference}{match.group(3)}"
+
+    return pattern.sub(replace, text).encode('utf-8')
+
+
+def write_variants(output_dir, path, content):
+    """Write the file plus its gzip/brotli variants when they are smaller"""
+    target = os.path.join(output_dir, path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, 'wb') as f:
+        f.write(content)
+    if not path.endswith(COMPRESSIBLE_EXTENSIONS):
+        return
+    variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(content, quality=11)
+    for suffix, compressed in variants.items():
+        if len(compressed) < len(content):
+            with open(target + suffix, 'wb') as f:
+                f.write(compressed)
+
+
+def build(source_dir=SOURCE_DIR, output_dir=BUILD_DIR):
+    """Copy static/ into output_dir with hashed names and precompressed variants"""
+    files = []
+    for root, _, names in os.walk(source_dir):
+        for name in names:
+            files.append(os.path.relpath(os.path.join(root, name), source_dir).replace(os.sep, '/'))
+
+    # Hash plain files first, then CSS (it references fonts/images), then the entry pages
+    def build_order(path):
+        if path in ENTRY_PAGES:
+            return 2
+        return 1 if path.endswith('.css') else 0
+
+    if os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+    os.makedirs(output_dir)
+
+    manifest = {}
+    for path in sorted(files, key=lambda p: (build_order(p), p)):
+        with open(os.path.join(source_dir, path), 'rb') as f:
+            content = f.read()
+        base = os.path.dirname(path)
+        if path.endswith('.css'):
+            content = rewrite_references(content, CSS_REFERENCE, base, manifest)
+        elif path.endswith('.html'):
+            content = rewrite_references(content, HTML_REFERENCE, base, manifest)
+        output_path = path if path in ENTRY_PAGES else hashed_name(path, content)
+        manifest[path] = output_path
+        write_variants(output_dir, output_path, content)
+
+    with open(os.path.join(output_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(build_dir=BUILD_DIR):
+    try:
+        with open(os.path.join(build_dir, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def send_precompressed(build_dir, path, cache_control):
+    """Send the best precompressed variant the client accepts"""
+    file_path = os.path.join(build_dir, path)
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    encoding = None
+    for name, suffix in ENCODINGS:
+        if request.accept_encodings[name] and os.path.exists(file_path + suffix):
+            file_path += suffix
+            encoding = name
+            break
+    response = send_file(file_path, mimetype=mimetype, conditional=True, etag=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def init_app(app, build_dir=BUILD_DIR):
+    """Serve the built assets when a build exists, otherwise leave Flask's static route alone"""
+    manifest = load_manifest(build_dir)
+    if manifest is None:
+        return False
+    hashed_files = {path for source, path in manifest.items() if source not in ENTRY_PAGES}
+
+    @app.before_request
+    def serve_built_asset():
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        path = request.path.lstrip('/')
+        if path == '':
+            path = 'index.html'
+        if path in hashed_files:
+            return send_precompressed(build_dir, path, IMMUTABLE_CACHE_CONTROL)
+        if path in ENTRY_PAGES:
+            return send_precompressed(build_dir, path, ENTRY_CACHE_CONTROL)
+        return None
+
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build hashed, precompressed static assets")
+    parser.add_argument('--source', default=SOURCE_DIR)
+    parser.add_argument('--output', default=BUILD_DIR)
+    args = parser.parse_args()
+    if brotli is None:
+        print("brotli is not installed, writing gzip variants only")
+    manifest = build(args.source, args.output)
+    print(f"Built {len(manifest)} files into {args.output}")
+
+
+if __name__ == '__main__':
+    main()
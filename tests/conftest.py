@@ -0,0 +1,45 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'benchmarks'))
+
+from generate_corpus import generate  # noqa: E402
+
+# The app loads its datasets when imported: a small synthetic corpus, written before any test imports it
+DATA_DIR = tempfile.mkdtemp(prefix='films-tests-')
+os.environ['DATA_DIR'] = DATA_DIR
+# Builds run in the request thread, no process pool is started by the tests
+os.environ['COMPUTE_WORKERS'] = '0'
+generate(300, DATA_DIR)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    import app
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def counter():
+    """Current value of a prometheus counter sample, 0 when it was never incremented"""
+    from prometheus_client import REGISTRY
+
+    def value(name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    return value
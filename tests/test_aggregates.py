@@ -0,0 +1,20 @@
+import os
+
+import pytest
+
+import aggregates as aggregates_module
+
+
+def test_failed_ingest_keeps_the_aggregate_state(app_module, monkeypatch):
+    snapshot = app_module.aggregates
+    before = snapshot.state.to_json()
+    film = dict(app_module.store.records(aggregates_module.STATE_DATASET)[0], imdb=1.0)
+
+    def disk_full(file_path, films):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(snapshot, '_write_dataset', disk_full)
+    with pytest.raises(OSError):
+        snapshot.ingest([film])
+    assert snapshot.state.to_json() == before
+    assert os.path.exists(app_module.store.path(aggregates_module.STATE_DATASET))
@@ -0,0 +1,34 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data_wrangling'))
+
+import data_preparation  # noqa: E402
+from data_preparation import iter_films  # noqa: E402
+
+
+def test_films_cut_by_the_chunks_are_decoded(tmp_path):
+    films = [{'title': 'x' * n + 'é\U0001F600', 'imdb': -1.5e-3, 'cast': [True, None]} for n in range(200)]
+    path = tmp_path / 'films.json'
+    path.write_text(json.dumps(films, indent=1), encoding='utf-8')
+    for chunk_size in (1, 7, 97, data_preparation.CHUNK_SIZE):
+        assert list(iter_films(path, chunk_size)) == films
+
+
+def test_malformed_film_is_not_read_to_the_end(tmp_path):
+    path = tmp_path / 'films.json'
+    # Reading past the first chunk would fail on the undecodable byte instead
+    path.write_bytes(b'[{"title": 1,, "year": 2}' + b' ' * 100_000 + b'\xff]')
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_films(path, 97))
+
+
+def test_oversized_film_raises(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_preparation, 'MAX_RECORD_SIZE', 1000)
+    path = tmp_path / 'films.json'
+    path.write_text('[{"title": "%s"}]' % ('x' * 5000), encoding='utf-8')
+    with pytest.raises(ValueError, match='larger than 1000'):
+        list(iter_films(path, 97))
@@ -0,0 +1,16 @@
+from figures import FigureCache
+
+
+def test_evicted_current_figure_counts_as_hit(app_module, counter):
+    cache = FigureCache(app_module.store, max_entries=1)
+    cache.get('a', lambda: b'a')
+    cache.get('b', lambda: b'b')
+    hits = counter('cache_events_total', cache='figure', result='hit')
+
+    # 'a' fell out of the LRU but is still current: served without a build, counted as a hit
+    assert cache.lookup('a', lambda: b'rebuilt') == (b'a', True)
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert counter('cache_events_total', cache='figure', result='hit') == hits + 1
+    # and it is back in the LRU
+    assert cache.lookup('a', lambda: b'rebuilt') == (b'a', True)
+    assert (cache.hits, cache.misses) == (2, 2)
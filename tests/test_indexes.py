@@ -0,0 +1,25 @@
+from indexes import DatasetIndex, FilmIndex
+
+
+def test_index_hits_and_misses_are_counted(app_module, counter):
+    index = DatasetIndex(FilmIndex, store=app_module.store)
+    hits = counter('cache_events_total', cache='index', result='hit')
+    misses = counter('cache_events_total', cache='index', result='miss')
+
+    # Built on the first lookup of a dataset version, reused afterwards
+    built = index.get()
+    assert built is not None
+    assert index.get() is built
+    assert index.get() is built
+    assert counter('cache_events_total', cache='index', result='miss') == misses + 1
+    assert counter('cache_events_total', cache='index', result='hit') == hits + 2
+
+
+def test_year_range_is_clamped_to_the_dataset(app_module, client):
+    index = app_module.film_indexes.get()
+    result = index.decade_avg_imdb(index.select(0, 30_000_000), bucket=1, year_from=0, year_to=30_000_000)
+    assert len(result['labels']) == index.max_year - index.min_year + 1
+    assert result == index.decade_avg_imdb(index.select(), bucket=1)
+
+    response = client.get('/api/decade_hits?bucket=1&year_from=0&year_to=30000000')
+    assert response.status_code == 400
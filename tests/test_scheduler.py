@@ -0,0 +1,52 @@
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+from scheduler import ComputeScheduler, ComputeTimeout
+
+
+def test_timeout_raises_compute_timeout():
+    scheduler = ComputeScheduler(max_workers=0, timeout=0.05)
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        time.sleep(0.5)
+        return 'done'
+
+    builder = threading.Thread(target=scheduler.run, args=('key', slow))
+    builder.start()
+    started.wait()
+    # The second caller waits for the build already running and gives up after the timeout
+    with pytest.raises(ComputeTimeout):
+        scheduler.run('key', slow)
+    builder.join()
+    assert scheduler.timeouts == 1
+    assert ComputeTimeout is concurrent.futures.TimeoutError
+
+
+def test_figure_timeout_answers_503(app_module, client, monkeypatch):
+    def timed_out(*args, **kwargs):
+        raise concurrent.futures.TimeoutError()
+
+    monkeypatch.setattr(app_module.figure_cache, 'lookup', timed_out)
+    response = client.get('/api/radar_chart')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
+
+
+def test_dashboard_timeout_answers_503(app_module, client, monkeypatch):
+    def timed_out(*args, **kwargs):
+        raise concurrent.futures.TimeoutError()
+
+    monkeypatch.setattr(app_module, 'cached_figure', timed_out)
+    response = client.get('/api/dashboard?sections=genres,radar_chart')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
+
+    # A streamed dashboard has already sent its status, the slow section is left empty
+    response = client.get('/api/dashboard?sections=genres,radar_chart&stream=1')
+    assert response.status_code == 200
+    assert b'{"section":"radar_chart","data":null}' in response.get_data()
@@ -0,0 +1,115 @@
+import json
+import struct
+
+import numpy as np
+import pandas as pd
+
+# Response formats of the scatter endpoints
+FORMAT_OBJECTS = 'objects'    # [{label, data: [{x, y, title, link}, ...]}, ...] (default)
+FORMAT_COLUMNAR = 'columnar'  # parallel arrays with dictionary encoded strings
+FORMAT_BINARY = 'binary'      # columnar header + little-endian typed arrays
+
+OBJECTS_MIMETYPE = 'application/json'
+COLUMNAR_MIMETYPE = 'application/vnd.films.columnar+json'
+BINARY_MIMETYPE = 'application/vnd.films.columnar'
+
+MIMETYPES = {
+    FORMAT_OBJECTS: OBJECTS_MIMETYPE,
+    FORMAT_COLUMNAR: COLUMNAR_MIMETYPE,
+    FORMAT_BINARY: BINARY_MIMETYPE,
+}
+
+LINK_PREFIX = 'https://www.imdb.com/title/'
+# Film links are reduced to the numeric part of the title ID (tt0111161 -> 111161)
+LINK_ID_PATTERN = r'^https?://(?:www\.)?imdb\.com/title/tt(\d+)/'
+TITLE_ID_DIGITS = 7
+
+BINARY_MAGIC = b'FLMC'
+
+
+def negotiate_format(request):
+    """Pick the response format from ?format= or, failing that, the Accept header"""
+    requested = request.args.get('format')
+    if requested:
+        return requested if requested in MIMETYPES else None
+    # Browsers send */* which matches the first (default) entry
+    best = request.accept_mimetypes.best_match(
+        [OBJECTS_MIMETYPE, COLUMNAR_MIMETYPE, BINARY_MIMETYPE], default=OBJECTS_MIMETYPE)
+    return {mimetype: name for name, mimetype in MIMETYPES.items()}[best]
+
+
+def _link_ids(links):
+    """Title ID numbers for IMDb links, 0 where a link does not follow the usual pattern"""
+    ids = pd.Series(links, dtype=object).str.extract(LINK_ID_PATTERN, expand=False)
+    return pd.to_numeric(ids, errors='coerce').fillna(0).astype(np.uint32).to_numpy()
+
+
+def _encode(columns):
+    # Shared by both columnar formats: dictionary encode titles and shorten the links
+    all_titles = np.concatenate([titles for _, _, _, titles, _ in columns]) if columns else np.array([])
+    title_codes, title_dictionary = pd.factorize(pd.Series(all_titles, dtype=object), sort=False)
+    all_links = np.concatenate([links for _, _, _, _, links in columns]) if columns else np.array([])
+    link_ids = _link_ids(all_links)
+    # Links we can't rebuild from an ID are sent in full, keyed by point index
+    other_links = {
+        str(i): all_links[i] for i in np.flatnonzero(link_ids == 0).tolist()
+    }
+    return title_codes.astype(np.uint32), title_dictionary.tolist(), link_ids, other_links
+
+
+def encode_columnar(columns):
+    """JSON-ready columnar payload for the output of aggregates.scatter_columns"""
+    title_codes, title_dictionary, link_ids, other_links = _encode(columns)
+    datasets = []
+    start = 0
+    for label, xs, ys, _, _ in columns:
+        end = start + len(xs)
+        datasets.append({
+            'label': label,
+            'x': xs.tolist(),
+            'y': ys.tolist(),
+            'title': title_codes[start:end].tolist(),
+            'link': link_ids[start:end].tolist(),
+        })
+        start = end
+    return {
+        'format': FORMAT_COLUMNAR,
+        'titles': title_dictionary,
+        'link_prefix': LINK_PREFIX,
+        'link_digits': TITLE_ID_DIGITS,
+        'links': other_links,
+        'datasets': datasets,
+    }
+
+
+def encode_binary(columns):
+    """Binary payload for the output of aggregates.scatter_columns.
+
+    Layout (little-endian): b'FLMC', uint32 header length, JSON header padded
+    with spaces to an 8-byte boundary, then Float64 x, Float64 y, Uint32 title
+    index and Uint32 link ID arrays, each holding the points of all datasets
+    one after another (dataset sizes are listed in the header).
+    """
+    title_codes, title_dictionary, link_ids, other_links = _encode(columns)
+    header = json.dumps({
+        'format': FORMAT_BINARY,
+        'labels': [label for label, _, _, _, _ in columns],
+        'counts': [len(xs) for _, xs, _, _, _ in columns],
+        'titles': title_dictionary,
+        'link_prefix': LINK_PREFIX,
+        'link_digits': TITLE_ID_DIGITS,
+        'links': other_links,
+    }, ensure_ascii=False).encode('utf-8')
+    header += b' ' * (-(len(BINARY_MAGIC) + 4 + len(header)) % 8)
+
+    xs = np.concatenate([xs for _, xs, _, _, _ in columns]) if columns else np.array([])
+    ys = np.concatenate([ys for _, _, ys, _, _ in columns]) if columns else np.array([])
+    return b''.join([
+        BINARY_MAGIC,
+        struct.pack('<I', len(header)),
+        header,
+        xs.astype('<f8').tobytes(),
+        ys.astype('<f8').tobytes(),
+        title_codes.astype('<u4').tobytes(),
+        link_ids.astype('<u4').tobytes(),
+    ])